@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter
+
+from ..config import settings
+
+METRIC_CACHE_LOOKUPS = Counter("ingest_llm_cache_lookups", "LLM result cache lookups", ["result"])
+
+_WHITESPACE = re.compile(r"\s+")
+# Run disk eviction once every this many writes
+_EVICT_EVERY = 200
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return _WHITESPACE.sub(" ", (text or "")).strip().lower()
+
+
+def generation_cache_key(model: str, prompt_version: str, title: Optional[str], summary: Optional[str]) -> str:
+    content = hashlib.sha256(f"{normalize_text(title)}\n{normalize_text(summary)}".encode("utf-8")).hexdigest()
+    return f"{model}:{prompt_version}:{content}"
+
+
+class GenerationCache:
+    """Two-tier cache of LLM generation results: in-memory LRU over a SQLite file."""
+
+    def __init__(self, path: str, memory_items: int, disk_items: int, max_age_seconds: int) -> None:
+        self.path = path
+        self.memory_items = max(0, memory_items)
+        self.disk_items = max(0, disk_items)
+        self.max_age_seconds = max_age_seconds
+        self._memory: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path or self.disk_items == 0:
+            return None
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS generations (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_generations_created_at ON generations (created_at)")
+        return self._conn
+
+    def _remember(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        if self.memory_items == 0:
+            return
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _memory_lookup(self, key: str, cutoff: float) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is not None and entry[0] >= cutoff:
+            self._memory.move_to_end(key)
+            METRIC_CACHE_LOOKUPS.labels(result="memory_hit").inc()
+            return entry[1]
+        return None
+
+    def get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        """Memory tier only; a miss here is not counted, call get() to fall through to disk."""
+        with self._lock:
+            return self._memory_lookup(key, time.time() - self.max_age_seconds)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        cutoff = time.time() - self.max_age_seconds
+        with self._lock:
+            value = self._memory_lookup(key, cutoff)
+            if value is not None:
+                return value
+            try:
+                db = self._db()
+                row = db.execute("SELECT value, created_at FROM generations WHERE key = ?", (key,)).fetchone() if db else None
+            except sqlite3.Error:
+                row = None
+            if row is not None and row[1] >= cutoff:
+                value = json.loads(row[0])
+                self._remember(key, row[1], value)
+                METRIC_CACHE_LOOKUPS.labels(result="disk_hit").inc()
+                return value
+        METRIC_CACHE_LOOKUPS.labels(result="miss").inc()
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            try:
+                db = self._db()
+                if db is None:
+                    return
+                db.execute(
+                    "INSERT OR REPLACE INTO generations (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now),
+                )
+                self._writes += 1
+                if self._writes % _EVICT_EVERY == 0:
+                    self._evict(db, now)
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        db.execute("DELETE FROM generations WHERE created_at < ?", (now - self.max_age_seconds,))
+        db.execute(
+            "DELETE FROM generations WHERE key IN ("
+            " SELECT key FROM generations ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_items,),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: GenerationCache | None = None
+
+
+def get_generation_cache() -> GenerationCache | None:
+    global _cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = GenerationCache(
+            path=settings.LLM_CACHE_PATH,
+            memory_items=settings.LLM_CACHE_MEMORY_ITEMS,
+            disk_items=settings.LLM_CACHE_MAX_DISK_ITEMS,
+            max_age_seconds=settings.LLM_CACHE_MAX_AGE_DAYS * 86400,
+        )
+    return _cache
+
+
+async def close_generation_cache() -> None:
+    global _cache
+    if _cache is not None:
+        # The lock may be held by a put() still running in a worker thread
+        await asyncio.to_thread(_cache.close)
+        _cache = None
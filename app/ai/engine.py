@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from tenacity import retry, stop_after_attempt, wait_fixed
+
+from ..config import settings
+
+# Imported on first use: litellm takes seconds to import and is dead weight with ENABLE_AI=false
+litellm: Any = None
+
+
+def load_litellm() -> Any:
+    global litellm
+    if litellm is None:
+        try:
+            import litellm as module
+        except Exception:  # pragma: no cover
+            return None
+        module.set_verbose = False
+        litellm = module
+    return litellm
+
+
+async def aload_litellm() -> Any:
+    """load_litellm() for coroutines: the first import runs in a worker thread, not on the loop."""
+    if litellm is not None:
+        return litellm
+    return await asyncio.to_thread(load_litellm)
+
+
+_CJK = re.compile("[一-鿿]")
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough provider-agnostic estimate; CJK text is closer to one token per character
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # A single request larger than the bucket may still go once the bucket is full
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class GenerationEngine:
+    """Async LLM access with a concurrency cap and provider RPM/TPM limits."""
+
+    def __init__(self) -> None:
+        self._semaphore = asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+        self._rpm: Optional[TokenBucket] = TokenBucket(settings.LLM_RPM_LIMIT) if settings.LLM_RPM_LIMIT > 0 else None
+        self._tpm: Optional[TokenBucket] = TokenBucket(settings.LLM_TPM_LIMIT) if settings.LLM_TPM_LIMIT > 0 else None
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        if self._rpm is not None:
+            await self._rpm.acquire(1)
+        if self._tpm is not None:
+            prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+            await self._tpm.acquire(prompt_tokens + max_tokens)
+        async with self._semaphore:
+            return await self._acompletion(messages, max_tokens)
+
+    @retry(stop=stop_after_attempt(2), wait=wait_fixed(1))
+    async def _acompletion(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        client = await aload_litellm()
+        if client is None:
+            raise RuntimeError("litellm is not installed")
+        response: Any = await client.acompletion(
+            model=settings.MODEL_NAME,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=max_tokens,
+            timeout=settings.REQUEST_TIMEOUT_SECONDS,
+            api_key=settings.MODEL_API_KEY,
+        )
+        return response["choices"][0]["message"]["content"]
@@ -1,65 +1,119 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Dict, Any
-from tenacity import retry, stop_after_attempt, wait_fixed
-
-try:
-    import litellm
-except Exception:  # pragma: no cover
-    litellm = None  # type: ignore
+from typing import Dict, Any, List, Optional
 
 from ..config import settings
-from ..schemas import CollectedItem, StandardTask
-from ..utils.dedupe import compute_item_hash
+from ..schemas import FeedItem, StandardTask
+from ..utils.batching import MicroBatcher
+from .cache import generation_cache_key, get_generation_cache
+from .engine import GenerationEngine, aload_litellm
 
 
 SYSTEM_PROMPT = (
     "你是一个任务信息抽取助手。请从输入的新闻/公告中提取标准化任务，使用 JSON 格式输出："
     "{title, description, priority, status}. priority 取值: low|medium|high, status 固定为 not_started。"
 )
+BATCH_SYSTEM_PROMPT = (
+    "你是一个任务信息抽取助手。输入包含多条带编号的新闻/公告，请为每一条提取标准化任务，"
+    "只输出一个 JSON 数组，每个元素为 {index, title, description, priority, status}，index 与输入编号一致。"
+    "priority 取值: low|medium|high, status 固定为 not_started。"
+)
+# Bump whenever SYSTEM_PROMPT or the user prompt layout changes, so cached results are not reused
+PROMPT_VERSION = "1"
+
+
+def _user_prompt(item: FeedItem) -> str:
+    return f"标题: {item.title}\n摘要: {item.summary}\n链接: {item.url}"
+
+
+def _parse_object(text: str) -> Dict[str, Any]:
+    try:
+        # try find JSON in text
+        start = text.find("{")
+        end = text.rfind("}")
+        if start != -1 and end != -1:
+            text = text[start : end + 1]
+        data = json.loads(text)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        # fallthrough
+        return {}
+
+
+def _parse_array(text: str, size: int) -> List[Optional[Dict[str, Any]]]:
+    parsed: List[Optional[Dict[str, Any]]] = [None] * size
+    start = text.find("[")
+    end = text.rfind("]")
+    if start == -1 or end == -1:
+        return parsed
+    try:
+        entries = json.loads(text[start : end + 1])
+    except Exception:
+        return parsed
+    if not isinstance(entries, list):
+        return parsed
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("index", position + 1)
+        if isinstance(index, int) and 1 <= index <= size and parsed[index - 1] is None:
+            parsed[index - 1] = entry
+    return parsed
 
 
 class TaskGenerator:
     def __init__(self) -> None:
         self.enabled = settings.ENABLE_AI and (settings.MODEL_API_KEY != "")
-        if self.enabled and litellm is not None:
-            # Configure provider
-            litellm.set_verbose = False
-
-    @retry(stop=stop_after_attempt(2), wait=wait_fixed(1))
-    def _call_llm(self, prompt: str) -> Dict[str, Any]:
-        assert litellm is not None
-        response = litellm.completion(
-            model=settings.MODEL_NAME,
-            messages=[
+        self.engine = GenerationEngine()
+        self._batcher: Optional[MicroBatcher[FeedItem, Dict[str, Any]]] = None
+        if settings.LLM_BATCH_SIZE > 1:
+            self._batcher = MicroBatcher(
+                self._call_llm_batch,
+                max_size=settings.LLM_BATCH_SIZE,
+                max_wait_seconds=settings.LLM_BATCH_WINDOW_MS / 1000,
+            )
+
+    async def _call_llm(self, prompt: str) -> Dict[str, Any]:
+        text = await self.engine.complete(
+            [
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
             ],
-            temperature=0.2,
-            max_tokens=400,
-            timeout=settings.REQUEST_TIMEOUT_SECONDS,
-            api_key=settings.MODEL_API_KEY,
+            max_tokens=settings.LLM_MAX_TOKENS,
         )
-        text = response["choices"][0]["message"]["content"]
+        return _parse_object(text)
+
+    async def _call_llm_batch(self, items: List[FeedItem]) -> List[Dict[str, Any]]:
+        if len(items) == 1:
+            return [await self._call_llm(_user_prompt(items[0]))]
+        prompt = "\n\n".join(f"[{i}]\n{_user_prompt(item)}" for i, item in enumerate(items, start=1))
         try:
-            # try find JSON in text
-            start = text.find("{")
-            end = text.rfind("}")
-            if start != -1 and end != -1:
-                text = text[start : end + 1]
-            data = json.loads(text)
-            return data
+            text = await self.engine.complete(
+                [
+                    {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=settings.LLM_MAX_TOKENS * len(items),
+            )
+            parsed = _parse_array(text, len(items))
         except Exception:
-            # fallthrough
-            return {}
+            parsed = [None] * len(items)
+        # Only the entries the model dropped or mangled are re-run one by one
+        missing = [i for i, data in enumerate(parsed) if not data]
+        if missing:
+            retried = await asyncio.gather(
+                *(self._call_llm(_user_prompt(items[i])) for i in missing), return_exceptions=True
+            )
+            for i, data in zip(missing, retried):
+                parsed[i] = data if isinstance(data, dict) else {}
+        return [data or {} for data in parsed]
 
-    def generate(self, item: CollectedItem) -> StandardTask:
-        external_source_id = item.raw.get("external_source_id") if item.raw else None
-        if not external_source_id:
-            external_source_id = compute_item_hash(item.source_id, str(item.url))
+    async def generate(self, item: FeedItem) -> StandardTask:
+        external_source_id = item.external_source_id
 
-        if not self.enabled or litellm is None:
+        if not self.enabled or await aload_litellm() is None:
             title = item.title or "未命名任务"
             description = (item.summary or title or "").strip()
             priority = "medium"
@@ -75,8 +129,22 @@ class TaskGenerator:
             )
 
         # AI path
-        user_prompt = f"标题: {item.title}\n摘要: {item.summary}\n链接: {item.url}"
-        data = self._call_llm(user_prompt)
+        cache = get_generation_cache()
+        cache_key = generation_cache_key(settings.MODEL_NAME, PROMPT_VERSION, item.title, item.summary)
+        data = None
+        if cache:
+            # Memory hits stay on the loop; only the SQLite tier goes to a thread
+            data = cache.get_memory(cache_key)
+            if data is None:
+                data = await asyncio.to_thread(cache.get, cache_key)
+        if data is None:
+            if self._batcher is not None:
+                data = await self._batcher.submit(item)
+            else:
+                data = await self._call_llm(_user_prompt(item))
+            # Empty means the completion could not be parsed; retry it next time
+            if cache and data:
+                await asyncio.to_thread(cache.put, cache_key, data)
         title = data.get("title") or (item.title or "未命名任务")
         description = data.get("description") or (item.summary or title)
         priority = data.get("priority") or "medium"
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+from prometheus_client import Counter, Histogram
+
+from ..config import settings
+from ..schemas import FeedItem
+from .engine import estimate_tokens
+
+METRIC_PROMPT_TOKENS = Histogram(
+    "ingest_prompt_tokens",
+    "Estimated title + summary tokens per item before (raw) and after (clean) preprocessing",
+    ["phase"],
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+METRIC_TRUNCATED = Counter("ingest_preprocess_truncated", "Item summaries cut down to the prompt token budget")
+
+# Content that never reads as text
+_SKIP = {"script", "style", "noscript", "iframe", "object", "svg", "template", "head", "form", "button", "select"}
+# Elements that end a line of text
+_BLOCK = {
+    "p", "div", "br", "li", "ul", "ol", "tr", "table", "blockquote", "pre", "section", "article",
+    "header", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "dd", "dt", "figcaption", "hr",
+}
+_TAGS = re.compile(r"<[^>]+>")
+_MARKUP = re.compile(r"<[a-zA-Z/!]|&(?:#\d+|#x[0-9a-fA-F]+|[a-zA-Z]+);")
+_SPACES = re.compile(r"[ \t\r\f\v\xa0​　]+")
+# Whole lines that feeds append to every entry: share/read-more links, CMS footers, HN metadata
+_BOILERPLATE = re.compile(
+    r"^(?:"
+    r"read (?:more|the rest|full (?:article|story))\b.*|continue reading\b.*|click here\b.*|"
+    r"the post .+ appeared first on .+|this (?:article|post) (?:was )?(?:originally )?(?:appeared|published) (?:first )?on .+|"
+    r"share (?:this|on)\b.*|(?:\d+\s+)?comments?|leave a (?:comment|reply)|related(?: posts| articles)?:?|"
+    r"(?:article|comments) url:.*|points: \d+|# comments: \d+|"
+    r"阅读(?:全文|原文|更多).*|查看(?:全文|原文|更多).*|点击(?:查看|阅读|这里).*|本文(?:来自|首发于|转载自).*|"
+    r"(?:分享到|相关阅读|相关文章)[:：]?.*"
+    r")$",
+    re.I,
+)
+
+
+class _TextTarget:
+    """lxml parser target collecting visible text line by line; builds no tree."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self._line: List[str] = []
+        self._skipped = 0
+
+    def _break(self) -> None:
+        if self._line:
+            self.lines.append("".join(self._line))
+            self._line = []
+
+    def start(self, tag: str, attrib) -> None:
+        if tag in _SKIP:
+            self._skipped += 1
+        elif tag in _BLOCK:
+            self._break()
+
+    def end(self, tag: str) -> None:
+        if tag in _SKIP:
+            self._skipped = max(0, self._skipped - 1)
+        elif tag in _BLOCK:
+            self._break()
+
+    def data(self, text: str) -> None:
+        if not self._skipped:
+            self._line.append(text)
+
+    def close(self) -> List[str]:
+        self._break()
+        return self.lines
+
+
+def html_to_text(text: Optional[str]) -> str:
+    """Visible text of an HTML fragment, one line per block, boilerplate lines dropped."""
+    if not text:
+        return ""
+    if _MARKUP.search(text):
+        from lxml import etree
+
+        try:
+            parser = etree.HTMLParser(target=_TextTarget(), remove_comments=True, remove_pis=True)
+            parser.feed(text)
+            lines = parser.close()
+        except etree.LxmlError:
+            lines = _TAGS.sub(" ", text).splitlines()
+    else:
+        lines = text.splitlines()
+    kept: List[str] = []
+    for line in lines:
+        line = _SPACES.sub(" ", line).strip()
+        if not line or _BOILERPLATE.match(line) or (kept and kept[-1] == line):
+            continue
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Longest prefix within ``budget`` estimated tokens, cut at a word boundary when one is near."""
+    if budget <= 0 or estimate_tokens(text) <= budget:
+        return text
+    # The estimate is monotonic in the prefix length, so binary search the cut
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text[:low]
+    space = max(cut.rfind(" "), cut.rfind("\n"))
+    if space > low - 40:
+        cut = cut[:space]
+    return cut.rstrip() + " …"
+
+
+def preprocess_item(item: FeedItem) -> FeedItem:
+    """Clean title and summary in place before they reach the prompt or the fallback description."""
+    METRIC_PROMPT_TOKENS.labels(phase="raw").observe(estimate_tokens(item.title or "") + estimate_tokens(item.summary or ""))
+    if item.title:
+        item.title = html_to_text(item.title).replace("\n", " ") or item.title
+    if item.summary:
+        summary = html_to_text(item.summary)
+        truncated = truncate_to_tokens(summary, settings.PROMPT_SUMMARY_MAX_TOKENS)
+        if truncated is not summary:
+            METRIC_TRUNCATED.inc()
+        item.summary = truncated
+    METRIC_PROMPT_TOKENS.labels(phase="clean").observe(estimate_tokens(item.title or "") + estimate_tokens(item.summary or ""))
+    return item
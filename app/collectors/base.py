@@ -1,15 +1,30 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import List
-from ..schemas import CollectedItem
+from typing import AsyncIterator, List, Optional
+from ..schemas import FeedItem
+from .polling import PollHints
 
 
 class Collector(ABC):
     id: str
     name: str
     interval_seconds: int
+    # Caching / scheduling hints seen on the last collect(), used by adaptive polling
+    poll_hints: Optional[PollHints] = None
 
     @abstractmethod
-    def collect(self) -> List[CollectedItem]:
-        raise NotImplementedError
\ No newline at end of file
+    async def collect(self) -> List[FeedItem]:
+        raise NotImplementedError
+
+    async def stream(self) -> AsyncIterator[FeedItem]:
+        """Items as they become available; override when the source can be parsed incrementally."""
+        for item in await self.collect():
+            yield item
+
+    async def commit(self) -> None:
+        """Persist what the last collect() saw (watermark, HTTP validators).
+
+        Called once its items have been processed or queued, so a run that fails
+        part-way collects the same entries again on the next poll.
+        """
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from ..schemas import FeedItem
+from ..utils.dates import parse_datetime
+from ..utils.urls import canonicalize_url
+from .watermark import EntryOrder, Watermark, entry_fingerprint
+
+# Entry elements of RSS 2.0 / RSS 1.0 (<item>) and Atom (<entry>), in any namespace
+_ENTRY_TAGS = ("{*}item", "{*}entry")
+_DATE_FIELDS = ("pubDate", "published", "date", "issued", "updated", "modified")
+_SUMMARY_FIELDS = ("description", "summary", "encoded", "content")
+
+
+def _localname(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _inner(element: Any) -> Optional[str]:
+    if len(element):
+        # Atom type="xhtml" content: keep the markup, the preprocess stage turns it into text
+        from lxml import etree
+
+        return (element.text or "") + "".join(etree.tostring(child, encoding="unicode") for child in element)
+    return element.text
+
+
+class FeedStreamParser:
+    """Incremental RSS/Atom parser: feed it chunks, get back the entries they completed.
+
+    Built on lxml's XMLPullParser (the push counterpart of iterparse). Each finished
+    entry element is turned into a FeedItem, then cleared and unlinked from the tree
+    together with everything before it, so memory holds about one chunk plus one
+    entry however long the document is.
+
+    Applies the same watermark rules as ``parse_feed``: known entries are skipped, and
+    in a feed known to run newest first, a known entry at or below the watermark sets
+    ``done`` so the caller can stop reading the body altogether.
+    """
+
+    def __init__(self, source_id: str, watermark: Optional[Watermark] = None) -> None:
+        from lxml import etree
+
+        self.source_id = source_id
+        self.watermark = watermark
+        self.done = False
+        self.fingerprints: List[str] = []
+        self.newest: Optional[datetime] = None
+        self._seen = set(watermark.seen) if watermark else set()
+        self._order = EntryOrder(watermark)
+        self._parser = etree.XMLPullParser(
+            events=("end",),
+            tag=_ENTRY_TAGS,
+            recover=True,
+            resolve_entities=False,
+            no_network=True,
+            remove_comments=True,
+            remove_pis=True,
+        )
+
+    def feed(self, chunk: bytes) -> List[FeedItem]:
+        if self.done:
+            return []
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[FeedItem]:
+        if self.done:
+            return []
+        from lxml import etree
+
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            # Truncated or broken tail; keep what was parsed
+            pass
+        return self._drain()
+
+    def advanced_watermark(self) -> Optional[Watermark]:
+        if self.watermark is None:
+            return None
+        return self.watermark.advance(
+            self.fingerprints, self.newest, settings.WATERMARK_SEEN_SIZE, descending=self._order.descending
+        )
+
+    def _drain(self) -> List[FeedItem]:
+        items: List[FeedItem] = []
+        for _, element in self._parser.read_events():
+            if self.done:
+                break
+            item = self._entry(element)
+            # Free the entry and every sibling before it; the root keeps only what is still open
+            element.clear(keep_tail=False)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+            if item is not None:
+                items.append(item)
+        return items
+
+    def _entry(self, element: Any) -> Optional[FeedItem]:
+        fields: Dict[str, Any] = {}
+        links: List[Any] = []
+        for child in element:
+            if not isinstance(child.tag, str):
+                continue
+            name = _localname(child.tag)
+            if name == "link":
+                links.append(child)
+            else:
+                fields.setdefault(name, child)
+
+        link = self._link(links, fields.get("guid"))
+        if not link:
+            return None
+        published_at = None
+        for name in _DATE_FIELDS:
+            if name in fields:
+                published_at = parse_datetime(fields[name].text)
+                if published_at is not None:
+                    break
+        if published_at is not None and (self.newest is None or published_at > self.newest):
+            self.newest = published_at
+        self._order.observe(published_at)
+
+        guid = fields.get("guid") if "guid" in fields else fields.get("id")
+        fp = entry_fingerprint((guid.text or "").strip() if guid is not None and guid.text else link)
+        if fp in self._seen:
+            if self._order.stop_at(fp, published_at):
+                self.done = True
+            return None
+        self._seen.add(fp)
+        self.fingerprints.append(fp)
+
+        summary = None
+        for name in _SUMMARY_FIELDS:
+            if name in fields:
+                summary = _inner(fields[name])
+                if summary:
+                    break
+        title = fields.get("title")
+        title_text = (title.text or "").strip() if title is not None else ""
+        return FeedItem(
+            source_id=self.source_id,
+            url=canonicalize_url(link),
+            title=title_text or None,
+            summary=summary,
+            published_at=published_at,
+        )
+
+    @staticmethod
+    def _link(links: List[Any], guid: Any) -> Optional[str]:
+        for element in links:
+            # Atom: <link rel="alternate" href="..."/>, rel defaults to alternate
+            href = element.get("href")
+            if href and element.get("rel", "alternate") == "alternate":
+                return href.strip()
+            # RSS: <link>https://...</link>
+            if element.text and element.text.strip():
+                return element.text.strip()
+        for element in links:
+            if element.get("href"):
+                return element.get("href").strip()
+        # RSS items may carry only a permalink guid
+        if guid is not None and guid.text and guid.get("isPermaLink", "true") != "false" and guid.text.strip().startswith("http"):
+            return guid.text.strip()
+        return None
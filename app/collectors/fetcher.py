@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple, TypeVar
+
+import httpx
+
+from ..config import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class FetchResult:
+    status_code: int
+    content: Optional[bytes] = None
+    headers: Optional[httpx.Headers] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+_http_client: httpx.AsyncClient | None = None
+_parse_executor: Executor | None = None
+# source_id -> {"etag": ..., "last_modified": ...}
+_validators: Dict[str, Dict[str, str]] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.REQUEST_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            headers={"User-Agent": settings.USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=settings.FEED_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.FEED_HTTP_MAX_KEEPALIVE,
+            ),
+        )
+    return _http_client
+
+
+def _get_parse_executor() -> Executor:
+    global _parse_executor
+    if _parse_executor is None:
+        if settings.FEED_PARSE_PROCESSES > 0:
+            _parse_executor = ProcessPoolExecutor(max_workers=settings.FEED_PARSE_PROCESSES)
+        else:
+            _parse_executor = ThreadPoolExecutor(max_workers=settings.FEED_PARSE_THREADS, thread_name_prefix="feed-parse")
+    return _parse_executor
+
+
+async def run_in_parser(fn: Callable[..., T], *args: Any) -> T:
+    # Parsing is CPU bound; keep it off the event loop
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_parse_executor(), fn, *args)
+
+
+async def run_in_parse_thread(fn: Callable[..., T], *args: Any) -> T:
+    # For stateful parsers that cannot be pickled into the process pool
+    executor = _get_parse_executor()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor if isinstance(executor, ThreadPoolExecutor) else None, fn, *args)
+
+
+def _conditional_headers(source_id: str) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    cached = _validators.get(source_id) or {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+
+async def fetch(source_id: str, url: str) -> FetchResult:
+    resp = await get_http_client().get(url, headers=_conditional_headers(source_id))
+    if resp.status_code == 304:
+        return FetchResult(status_code=304, headers=resp.headers)
+    resp.raise_for_status()
+    return FetchResult(
+        status_code=resp.status_code,
+        content=resp.content,
+        headers=resp.headers,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+    )
+
+
+@asynccontextmanager
+async def open_stream(source_id: str, url: str) -> AsyncIterator[Tuple[FetchResult, AsyncIterator[bytes]]]:
+    """Conditional GET whose body is read chunk by chunk instead of buffered.
+
+    Yields the result (without content) and an iterator over the body; on 304 the
+    iterator is empty. Leaving the block early closes the connection.
+    """
+    async with get_http_client().stream("GET", url, headers=_conditional_headers(source_id)) as resp:
+        if resp.status_code == 304:
+            yield FetchResult(status_code=304, headers=resp.headers), _empty_body()
+            return
+        resp.raise_for_status()
+        result = FetchResult(
+            status_code=resp.status_code,
+            headers=resp.headers,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+        yield result, resp.aiter_bytes(settings.FEED_STREAM_CHUNK_BYTES)
+
+
+async def _empty_body() -> AsyncIterator[bytes]:
+    return
+    yield b""
+
+
+def remember_validators(source_id: str, result: FetchResult) -> None:
+    # Only call once the items were processed, so a failed run is fetched in full next poll
+    if result.etag or result.last_modified:
+        _validators[source_id] = {"etag": result.etag or "", "last_modified": result.last_modified or ""}
+    else:
+        _validators.pop(source_id, None)
+
+
+async def close_fetcher() -> None:
+    global _http_client, _parse_executor
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False)
+        _parse_executor = None
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from prometheus_client import Counter
+
+from ..config import settings
+from ..schemas import FeedItem
+from ..utils.dates import parse_datetime
+from ..utils.urls import canonicalize_url
+from .base import Collector
+from .fetcher import FetchResult, fetch, remember_validators, run_in_parser
+from .polling import hints_from_headers
+from .watermark import Watermark, entry_fingerprint, get_watermark_store
+
+logger = logging.getLogger(__name__)
+
+METRIC_PAGES_UNCHANGED = Counter("ingest_html_pages_unchanged", "HTML pages skipped because their fingerprint did not change", ["collector"])
+
+_CHUNK = 64 * 1024
+# Never visible, and often carry per-request nonces or timestamps
+_INVISIBLE = {"script", "style", "noscript", "template", "svg", "head"}
+
+
+class _FingerprintTarget:
+    """lxml parser target hashing tags, link targets and visible text; builds no tree.
+
+    Attributes other than href are ignored so per-request tokens, cache-busting image
+    URLs and inline styles do not make an unchanged page look new.
+    """
+
+    def __init__(self) -> None:
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._hidden = 0
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        if tag in _INVISIBLE:
+            self._hidden += 1
+        elif not self._hidden:
+            self._hash.update(f"<{tag} {attrib.get('href', '')}>".encode("utf-8", "replace"))
+
+    def end(self, tag: str) -> None:
+        if tag in _INVISIBLE and self._hidden:
+            self._hidden -= 1
+
+    def data(self, text: str) -> None:
+        if not self._hidden:
+            text = " ".join(text.split())
+            if text:
+                self._hash.update(text.encode("utf-8", "replace"))
+
+    def close(self) -> str:
+        return self._hash.hexdigest()
+
+
+def _feed(parser: Any, content: bytes) -> Any:
+    # Incremental parse: libxml2 only ever holds one chunk of input besides what it builds
+    for start in range(0, len(content), _CHUNK):
+        parser.feed(content[start : start + _CHUNK])
+    return parser.close()
+
+
+def page_fingerprint(content: bytes, encoding: Optional[str] = None) -> str:
+    from lxml import etree
+
+    return _feed(etree.HTMLParser(target=_FingerprintTarget(), encoding=encoding), content)
+
+
+@lru_cache(maxsize=256)
+def compile_selector(selector: str) -> Callable[[Any], List[Any]]:
+    """XPath for selectors starting with '/', './', '@', '(' or 'xpath:'; CSS otherwise (needs cssselect)."""
+    from lxml import etree
+
+    if selector.startswith("xpath:") or selector.startswith(("/", "./", "../", "@", "(")):
+        path = selector[len("xpath:") :] if selector.startswith("xpath:") else selector
+        try:
+            return etree.XPath(path)
+        except etree.XPathError as exc:
+            raise ValueError(f"invalid XPath selector {selector!r}") from exc
+    try:
+        from lxml.cssselect import CSSSelector
+    except ImportError as exc:  # pragma: no cover
+        raise ValueError(f"CSS selector {selector!r} needs the cssselect package; use XPath instead") from exc
+    try:
+        return CSSSelector(selector, translator="html")
+    except Exception as exc:
+        raise ValueError(f"invalid CSS selector {selector!r} (relative XPath must start with './')") from exc
+
+
+def _first(node: Any, selector: Optional[str]) -> Any:
+    if not selector:
+        return None
+    found = compile_selector(selector)(node)
+    return found[0] if found else None
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = value if isinstance(value, str) else "".join(value.itertext())
+    return " ".join(text.split()) or None
+
+
+def _href(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    href = value.get("href")
+    if href is None:
+        links = value.xpath(".//a[@href]")
+        href = links[0].get("href") if links else None
+    return href
+
+
+def _charset(content_type: str) -> Optional[str]:
+    # Without a header charset lxml falls back to <meta charset> / its own detection
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"')
+    return None
+
+
+def parse_page(
+    source_id: str,
+    url: str,
+    content: bytes,
+    selectors: Dict[str, str],
+    encoding: Optional[str] = None,
+    last_fingerprint: Optional[str] = None,
+    watermark: Optional[Watermark] = None,
+) -> Tuple[List[FeedItem], str, Optional[Watermark]]:
+    # Runs in the parse executor; must stay a module-level function so it can be pickled
+    fingerprint = page_fingerprint(content, encoding)
+    if fingerprint == last_fingerprint:
+        return [], fingerprint, watermark
+
+    from lxml import etree
+
+    root = _feed(etree.HTMLParser(encoding=encoding, remove_comments=True), content)
+    if root is None:
+        return [], fingerprint, watermark
+    base = root.xpath("string(//base/@href)") or url
+    seen = set(watermark.seen) if watermark else set()
+    items: List[FeedItem] = []
+    fingerprints: List[str] = []
+    newest: Optional[datetime] = None
+    for node in compile_selector(selectors["item"])(root):
+        link_node = _first(node, selectors.get("link")) if selectors.get("link") else node
+        link = _href(link_node)
+        if not link:
+            continue
+        link = canonicalize_url(urljoin(base, link.strip()))
+        published_at = parse_datetime(_text(_first(node, selectors.get("date"))))
+        if published_at is not None and (newest is None or published_at > newest):
+            newest = published_at
+        fp = entry_fingerprint(link)
+        if fp in seen:
+            continue
+        seen.add(fp)
+        fingerprints.append(fp)
+        title = _text(_first(node, selectors.get("title"))) or _text(node if isinstance(link_node, str) else link_node)
+        items.append(
+            FeedItem(
+                source_id=source_id,
+                url=link,
+                title=title,
+                summary=_text(_first(node, selectors.get("summary"))),
+                published_at=published_at,
+            )
+        )
+    if watermark is None:
+        return items, fingerprint, None
+    return items, fingerprint, watermark.advance(fingerprints, newest, settings.WATERMARK_SEEN_SIZE, page=fingerprint)
+
+
+class HTMLCollector(Collector):
+    """Scrapes a listing page (announcements, news, changelogs) that has no feed.
+
+    ``selectors`` maps ``item`` (required: one match per entry) and optionally
+    ``link``, ``title``, ``summary`` and ``date``, evaluated relative to each item.
+    A page whose fingerprint (tags, links and visible text) matches the last poll is
+    skipped before any selector runs; byte-identical bodies skip parsing altogether.
+    """
+
+    def __init__(self, source_id: str, name: str, url: str, selectors: Dict[str, str], interval_seconds: int = 600) -> None:
+        if not selectors or not selectors.get("item"):
+            raise ValueError(f"html source {source_id} needs selectors.item")
+        for selector in selectors.values():
+            compile_selector(selector)
+        self.id = source_id
+        self.name = name
+        self.url = url
+        self.selectors = dict(selectors)
+        self.interval_seconds = interval_seconds
+        self._body_digest: Optional[str] = None
+        self._fingerprint: Optional[str] = None
+        # Remembered by commit() once the items of the last collect() were processed
+        self._pending: Optional[Tuple[FetchResult, str, Optional[str], Optional[Watermark]]] = None
+
+    async def collect(self) -> List[FeedItem]:
+        self._pending = None
+        result = await fetch(self.id, self.url)
+        self.poll_hints = hints_from_headers(result.headers)
+        if result.not_modified:
+            return []
+        content = result.content or b""
+        body_digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        if body_digest == self._body_digest:
+            METRIC_PAGES_UNCHANGED.labels(collector=self.id).inc()
+            self._pending = (result, body_digest, self._fingerprint, None)
+            return []
+        store = get_watermark_store()
+        watermark = await store.get(self.id) if store else None
+        last_fingerprint = watermark.page if watermark and watermark.page else self._fingerprint
+        encoding = _charset(result.headers.get("content-type", "") if result.headers is not None else "")
+        items, fingerprint, advanced = await run_in_parser(
+            parse_page, self.id, self.url, content, self.selectors, encoding, last_fingerprint, watermark
+        )
+        if fingerprint == last_fingerprint:
+            METRIC_PAGES_UNCHANGED.labels(collector=self.id).inc()
+            logger.debug("Page %s unchanged", self.id)
+        self._pending = (result, body_digest, fingerprint, advanced if advanced != watermark else None)
+        return items
+
+    async def commit(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        result, self._body_digest, self._fingerprint, advanced = pending
+        remember_validators(self.id, result)
+        store = get_watermark_store()
+        if store and advanced is not None:
+            await store.save(self.id, advanced)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, FrozenSet, Mapping, Optional
+
+from ..config import settings
+
+# Channel-level elements sit before the first <item>; no need to scan the whole document
+_HINT_SCAN_BYTES = 64 * 1024
+_TTL = re.compile(rb"<ttl>\s*(\d+)\s*</ttl>", re.I)
+_SKIP_HOURS = re.compile(rb"<skipHours>(.*?)</skipHours>", re.I | re.S)
+_SKIP_DAYS = re.compile(rb"<skipDays>(.*?)</skipDays>", re.I | re.S)
+_HOUR = re.compile(rb"<hour>\s*(\d+)\s*</hour>", re.I)
+_DAY = re.compile(rb"<day>\s*(\w+)\s*</day>", re.I)
+_MAX_AGE = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)", re.I)
+_WEEKDAYS = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6}
+
+
+@dataclass
+class PollHints:
+    """Polling constraints announced by the server or the feed itself."""
+
+    min_delay: float = 0.0  # Cache-Control max-age, Expires or <ttl>: content will not change sooner
+    retry_after: float = 0.0  # Retry-After on 429/503: the server asked us to back off
+    skip_hours: FrozenSet[int] = frozenset()  # UTC hours from <skipHours>
+    skip_days: FrozenSet[int] = frozenset()  # weekday() numbers from <skipDays>
+
+    def merge(self, other: "PollHints") -> "PollHints":
+        return PollHints(
+            min_delay=max(self.min_delay, other.min_delay),
+            retry_after=max(self.retry_after, other.retry_after),
+            skip_hours=self.skip_hours | other.skip_hours,
+            skip_days=self.skip_days | other.skip_days,
+        )
+
+
+def _seconds_until(http_date: str) -> float:
+    try:
+        when = parsedate_to_datetime(http_date)
+    except (TypeError, ValueError, IndexError):
+        return 0.0
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def hints_from_headers(headers: Optional[Mapping[str, str]]) -> PollHints:
+    if not headers:
+        return PollHints()
+    min_delay = 0.0
+    cache_control = headers.get("Cache-Control") or ""
+    match = _MAX_AGE.search(cache_control)
+    if match and "no-cache" not in cache_control.lower():
+        min_delay = float(match.group(1))
+    elif headers.get("Expires"):
+        min_delay = _seconds_until(headers["Expires"])
+    retry_after = 0.0
+    value = (headers.get("Retry-After") or "").strip()
+    if value:
+        retry_after = float(value) if value.isdigit() else _seconds_until(value)
+    return PollHints(min_delay=min_delay, retry_after=retry_after)
+
+
+def hints_from_feed(content: Optional[bytes]) -> PollHints:
+    if not content:
+        return PollHints()
+    head = content[:_HINT_SCAN_BYTES]
+    min_delay = 0.0
+    match = _TTL.search(head)
+    if match:
+        min_delay = int(match.group(1)) * 60.0
+    hours: FrozenSet[int] = frozenset()
+    match = _SKIP_HOURS.search(head)
+    if match:
+        # The spec says 0-23 but plenty of feeds use 1-24
+        hours = frozenset(int(h) % 24 for h in _HOUR.findall(match.group(1)))
+    days: FrozenSet[int] = frozenset()
+    match = _SKIP_DAYS.search(head)
+    if match:
+        days = frozenset(_WEEKDAYS[d.decode().lower()] for d in _DAY.findall(match.group(1)) if d.decode().lower() in _WEEKDAYS)
+    # A feed that skips every hour is misconfigured; ignore it rather than never polling
+    if len(hours) >= 24:
+        hours = frozenset()
+    if len(days) >= 7:
+        days = frozenset()
+    return PollHints(min_delay=min_delay, skip_hours=hours, skip_days=days)
+
+
+@dataclass
+class _SourceRate:
+    last_poll: Optional[float] = None
+    rate: Optional[float] = None  # EWMA of new items per second
+    delay: Optional[float] = None
+    hints: PollHints = field(default_factory=PollHints)
+
+
+class AdaptivePoller:
+    """Per-source poll interval derived from how often the source actually yields new items.
+
+    The interval aims for about POLL_TARGET_NEW_ITEMS new items per poll, stays within
+    [POLL_MIN_SECONDS, POLL_MAX_SECONDS], backs off geometrically while a source is
+    quiet, and never undercuts caching hints or Retry-After.
+    """
+
+    def __init__(self) -> None:
+        self._sources: Dict[str, _SourceRate] = {}
+
+    def observe(self, source_id: str, new_items: int, hints: Optional[PollHints] = None, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        state = self._sources.setdefault(source_id, _SourceRate())
+        # The first poll drains whatever backlog the feed holds, so it says nothing about the rate
+        if state.last_poll is not None and now > state.last_poll:
+            sample = new_items / (now - state.last_poll)
+            alpha = settings.POLL_RATE_ALPHA
+            state.rate = sample if state.rate is None else alpha * sample + (1 - alpha) * state.rate
+        state.last_poll = now
+        state.hints = hints or PollHints()
+
+    def next_delay(self, source_id: str, base_interval: float) -> float:
+        state = self._sources.setdefault(source_id, _SourceRate())
+        low, high = settings.POLL_MIN_SECONDS, max(settings.POLL_MIN_SECONDS, settings.POLL_MAX_SECONDS)
+        previous = state.delay or base_interval
+        if state.rate is None:
+            delay = base_interval
+        elif state.rate > 0:
+            delay = settings.POLL_TARGET_NEW_ITEMS / state.rate
+        else:
+            delay = previous * settings.POLL_BACKOFF_FACTOR
+        delay = min(max(delay, low), high)
+        state.delay = delay
+        # Caching hints are capped by our upper bound; an explicit Retry-After is not
+        return max(delay, min(state.hints.min_delay, high), state.hints.retry_after)
+
+    def next_run_time(self, source_id: str, base_interval: float, now: Optional[datetime] = None) -> datetime:
+        delay = self.next_delay(source_id, base_interval)
+        hints = self._sources[source_id].hints
+        delay *= 1 + random.uniform(-settings.POLL_JITTER_RATIO, settings.POLL_JITTER_RATIO)
+        delay = max(delay, hints.retry_after, 1.0)
+        now = now or datetime.now(timezone.utc)
+        when = now + timedelta(seconds=delay)
+        # Move forward an hour at a time past skipHours/skipDays (bounded to one week)
+        for _ in range(24 * 7):
+            utc = when.astimezone(timezone.utc)
+            if utc.hour not in hints.skip_hours and utc.weekday() not in hints.skip_days:
+                break
+            when = utc.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1, seconds=random.uniform(0, 60))
+        return when
@@ -1,41 +1,136 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import logging
 import time
-import feedparser
 
-from ..schemas import CollectedItem
-from ..utils.dedupe import compute_item_hash
+from ..config import settings
+from ..schemas import FeedItem
+from ..utils.urls import canonicalize_url
+from .base import Collector
+from .feed_stream import FeedStreamParser
+from .fetcher import FetchResult, fetch, open_stream, remember_validators, run_in_parse_thread, run_in_parser
+from .polling import hints_from_feed, hints_from_headers
+from .watermark import EntryOrder, Watermark, entry_fingerprint, get_watermark_store
 
+logger = logging.getLogger(__name__)
 
-class RSSCollector:
-    def __init__(self, source_id: str, name: str, url: str, interval_seconds: int = 600) -> None:
+# Body prefix kept for hints_from_feed (<ttl>, <skipHours>, <skipDays> sit in the channel header)
+_HINT_HEAD_BYTES = 64 * 1024
+
+
+def parse_feed(
+    source_id: str, content: bytes, response_headers: Dict[str, Any], watermark: Optional[Watermark] = None
+) -> Tuple[List[FeedItem], Optional[Watermark]]:
+    # Runs in the parse executor; must stay a module-level function so it can be pickled
+    import feedparser
+
+    feed = feedparser.parse(content, response_headers=response_headers)
+    items: List[FeedItem] = []
+    seen = set(watermark.seen) if watermark else set()
+    order = EntryOrder(watermark)
+    fingerprints: List[str] = []
+    newest: Optional[datetime] = None
+    for entry in feed.entries:
+        link = getattr(entry, "link", None)
+        if not link:
+            continue
+        published_parsed = getattr(entry, "published_parsed", None)
+        published_at = datetime.fromtimestamp(time.mktime(published_parsed)) if published_parsed else None
+        if published_at is not None and (newest is None or published_at > newest):
+            newest = published_at
+        order.observe(published_at)
+        fp = entry_fingerprint(getattr(entry, "id", None) or link)
+        if fp in seen:
+            if order.stop_at(fp, published_at):
+                break
+            continue
+        fingerprints.append(fp)
+        items.append(
+            FeedItem(
+                source_id=source_id,
+                url=canonicalize_url(link),
+                title=getattr(entry, "title", None),
+                summary=getattr(entry, "summary", None),
+                published_at=published_at,
+            )
+        )
+    if watermark is None:
+        return items, None
+    return items, watermark.advance(fingerprints, newest, settings.WATERMARK_SEEN_SIZE, descending=order.descending)
+
+
+class RSSCollector(Collector):
+    def __init__(
+        self, source_id: str, name: str, url: str, interval_seconds: int = 600, streaming: Optional[bool] = None
+    ) -> None:
         self.id = source_id
         self.name = name
         self.url = url
         self.interval_seconds = interval_seconds
+        # None follows FEED_STREAMING; a source can opt out if lxml chokes on it where feedparser copes
+        self.streaming = settings.FEED_STREAMING if streaming is None else streaming
+        self._pending: Optional[Tuple[FetchResult, Optional[Watermark]]] = None
 
-    def collect(self) -> List[CollectedItem]:
-        feed = feedparser.parse(self.url)
-        items: List[CollectedItem] = []
-        for entry in feed.entries:
-            link = getattr(entry, "link", None)
-            title = getattr(entry, "title", None)
-            summary = getattr(entry, "summary", None)
-            published_parsed = getattr(entry, "published_parsed", None)
-            published_at = datetime.fromtimestamp(time.mktime(published_parsed)) if published_parsed else None
-            if not link:
-                continue
-            external_source_id = compute_item_hash(self.id, link)
-            items.append(
-                CollectedItem(
-                    source_id=self.id,
-                    url=link,
-                    title=title,
-                    summary=summary,
-                    published_at=published_at,
-                    raw={"external_source_id": external_source_id},
-                )
-            )
-        return items
\ No newline at end of file
+    def _hold(self, result: FetchResult, watermark: Optional[Watermark], advanced: Optional[Watermark]) -> None:
+        self._pending = (result, advanced if advanced is not None and advanced != watermark else None)
+
+    async def commit(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        result, advanced = pending
+        remember_validators(self.id, result)
+        store = get_watermark_store()
+        if store and advanced is not None:
+            await store.save(self.id, advanced)
+
+    async def collect(self) -> List[FeedItem]:
+        if self.streaming:
+            return [item async for item in self.stream()]
+        return await self._collect_buffered()
+
+    async def stream(self) -> AsyncIterator[FeedItem]:
+        if not self.streaming:
+            for item in await self._collect_buffered():
+                yield item
+            return
+        self._pending = None
+        store = get_watermark_store()
+        watermark = await store.get(self.id) if store else None
+        parser = FeedStreamParser(self.id, watermark)
+        head = b""
+        async with open_stream(self.id, self.url) as (result, body):
+            self.poll_hints = hints_from_headers(result.headers)
+            if result.not_modified:
+                logger.debug("Feed %s not modified", self.id)
+                return
+            async for chunk in body:
+                if len(head) < _HINT_HEAD_BYTES:
+                    head += chunk[: _HINT_HEAD_BYTES - len(head)]
+                # Pull parsing, URL canonicalisation and hashing add up to a few ms per chunk
+                for item in await run_in_parse_thread(parser.feed, chunk):
+                    yield item
+                if parser.done:
+                    # Reached entries handled by an earlier poll: stop downloading
+                    break
+        for item in await run_in_parse_thread(parser.close):
+            yield item
+        self.poll_hints = self.poll_hints.merge(hints_from_feed(head))
+        self._hold(result, watermark, parser.advanced_watermark())
+
+    async def _collect_buffered(self) -> List[FeedItem]:
+        self._pending = None
+        result = await fetch(self.id, self.url)
+        self.poll_hints = hints_from_headers(result.headers)
+        if result.not_modified:
+            logger.debug("Feed %s not modified", self.id)
+            return []
+        store = get_watermark_store()
+        watermark = await store.get(self.id) if store else None
+        headers = dict(result.headers or {})
+        self.poll_hints = self.poll_hints.merge(hints_from_feed(result.content))
+        items, advanced = await run_in_parser(parse_feed, self.id, result.content or b"", headers, watermark)
+        self._hold(result, watermark, advanced)
+        return items
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from ..config import settings
+from ..utils.dedupe import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+def entry_fingerprint(guid_or_link: str) -> str:
+    # 64-bit digest is plenty to recognise entries of a single feed
+    return hashlib.blake2b(guid_or_link.encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass
+class Watermark:
+    """Newest published_at seen for a source plus fingerprints of its recent entries."""
+
+    newest: Optional[datetime] = None
+    seen: List[str] = field(default_factory=list)
+    # Fingerprint of the whole page, for sources scraped from HTML
+    page: Optional[str] = None
+    # Entry dates ran newest first on the last poll; early stopping relies on it
+    descending: bool = False
+
+    def advance(
+        self,
+        fingerprints: Iterable[str],
+        newest: Optional[datetime],
+        limit: int,
+        page: Optional[str] = None,
+        descending: Optional[bool] = None,
+    ) -> "Watermark":
+        merged: List[str] = []
+        known = set()
+        for fp in list(fingerprints) + self.seen:
+            if fp not in known:
+                known.add(fp)
+                merged.append(fp)
+        if self.newest is not None and (newest is None or self.newest > newest):
+            newest = self.newest
+        return Watermark(
+            newest=newest,
+            seen=merged[:limit],
+            page=page or self.page,
+            descending=self.descending if descending is None else descending,
+        )
+
+    def dumps(self) -> str:
+        data = {"newest": self.newest.isoformat() if self.newest else None, "seen": self.seen}
+        if self.page:
+            data["page"] = self.page
+        if self.descending:
+            data["descending"] = True
+        return json.dumps(data)
+
+    @classmethod
+    def loads(cls, raw: str) -> "Watermark":
+        data = json.loads(raw)
+        newest = datetime.fromisoformat(data["newest"]) if data.get("newest") else None
+        return cls(
+            newest=newest,
+            seen=list(data.get("seen") or []),
+            page=data.get("page"),
+            descending=bool(data.get("descending")),
+        )
+
+
+class EntryOrder:
+    """Decides when a known entry means the rest of a feed was handled by an earlier poll.
+
+    That only holds for feeds listing entries newest first, so stopping needs both the
+    watermark's record of a fully read poll in that order and the dates read so far
+    still descending. Oldest-first or unordered feeds are always read to the end.
+    """
+
+    def __init__(self, watermark: Optional[Watermark]) -> None:
+        self.watermark = watermark
+        self.known = set(watermark.seen) if watermark else set()
+        self.descending = True
+        self._last: Optional[datetime] = None
+
+    def observe(self, published_at: Optional[datetime]) -> None:
+        if published_at is None:
+            return
+        if self._last is not None and published_at > self._last:
+            self.descending = False
+        self._last = published_at
+
+    def stop_at(self, fingerprint: str, published_at: Optional[datetime]) -> bool:
+        watermark = self.watermark
+        return (
+            fingerprint in self.known
+            and self.descending
+            and watermark is not None
+            and watermark.descending
+            and watermark.newest is not None
+            and published_at is not None
+            and published_at <= watermark.newest
+        )
+
+
+class WatermarkStore:
+    """Per-source watermarks kept in memory and mirrored to Redis across restarts."""
+
+    def __init__(self) -> None:
+        self._marks: Dict[str, Watermark] = {}
+
+    async def get(self, source_id: str) -> Watermark:
+        mark = self._marks.get(source_id)
+        if mark is None:
+            mark = Watermark()
+            try:
+                raw = await get_async_redis().get(f"watermark:{source_id}")
+                if raw:
+                    mark = Watermark.loads(raw)
+            except Exception as exc:
+                logger.debug("Watermark load for %s failed: %s", source_id, exc)
+            self._marks[source_id] = mark
+        return mark
+
+    async def save(self, source_id: str, mark: Watermark) -> None:
+        self._marks[source_id] = mark
+        try:
+            await get_async_redis().set(f"watermark:{source_id}", mark.dumps(), ex=settings.DUP_TTL_DAYS * 86400)
+        except Exception as exc:
+            logger.debug("Watermark save for %s failed: %s", source_id, exc)
+
+
+_store: WatermarkStore | None = None
+
+
+def get_watermark_store() -> WatermarkStore | None:
+    global _store
+    if not settings.WATERMARK_ENABLED:
+        return None
+    if _store is None:
+        _store = WatermarkStore()
+    return _store
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import settings
 
@@ -9,6 +10,24 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, futu
 
 Base = declarative_base()
 
+_async_engine: AsyncEngine | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    # postgresql+psycopg serves both the sync and the asyncio engine
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(settings.POSTGRES_DSN, pool_pre_ping=True)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
 def init_db() -> None:
     from . import models  # noqa: F401 ensure models are imported
     Base.metadata.create_all(bind=engine)
\ No newline at end of file
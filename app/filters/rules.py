@@ -1,25 +1,73 @@
 from __future__ import annotations
 
-from typing import Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from ..schemas import CollectedItem, StandardTask
-from ..utils.dedupe import is_duplicate, compute_item_hash
+from ..config import settings
+from ..schemas import FeedItem, StandardTask
+from ..utils.dedupe import claim_keys, is_duplicate_async
+from ..utils.simhash import get_near_dup_index, simhash, tokenize
 
 
-def filter_collected_item(item: CollectedItem) -> Tuple[bool, str | None]:
-    # Basic sanity checks
-    if not item.url:
-        return False, "missing_url"
-    # Example: dedupe on source+url
-    key = compute_item_hash(item.source_id, str(item.url))
-    if is_duplicate(key):
-        return False, "duplicate_collected"
-    return True, None
+async def filter_collected_items(items: Sequence[FeedItem], claim: bool = True) -> List[Tuple[bool, str | None]]:
+    results: List[Tuple[bool, str | None]] = [(True, None)] * len(items)
+    keys: List[str] = []
+    positions: List[int] = []
+    for i, item in enumerate(items):
+        # Basic sanity checks
+        if not item.url:
+            results[i] = (False, "missing_url")
+            continue
+        # Example: dedupe on source+url
+        keys.append(item.external_source_id)
+        positions.append(i)
+    if not claim:
+        return results
+    # One pipelined round trip for the whole batch
+    duplicates = await claim_keys(keys)
+    for i, duplicate in zip(positions, duplicates):
+        if duplicate:
+            results[i] = (False, "duplicate_collected")
+    return results
 
 
-def filter_generated_task(task: StandardTask) -> Tuple[bool, str | None]:
+async def filter_near_duplicates(
+    items: Sequence[FeedItem], fingerprints: Optional[Dict[str, int]] = None
+) -> List[Tuple[bool, str | None]]:
+    """Same story under another URL or in another feed: compare title + summary text.
+
+    Only checks; kept items' fingerprints go into ``fingerprints`` and are recorded
+    with record_near_duplicate once their task exists, so an item that fails later
+    does not take its near-duplicates down with it.
+    """
+    results: List[Tuple[bool, str | None]] = [(True, None)] * len(items)
+    index = get_near_dup_index()
+    if index is None:
+        return results
+    await index.sync()
+    for i, item in enumerate(items):
+        tokens = tokenize(f"{item.title or ''} {item.summary or ''}")
+        # Too little text to tell a rewrite from a different story
+        if len(tokens) < settings.NEAR_DUP_MIN_TOKENS:
+            continue
+        fp = simhash(tokens[: settings.NEAR_DUP_MAX_TOKENS])
+        if index.find(fp, item.external_source_id):
+            results[i] = (False, "near_duplicate")
+        elif fingerprints is not None:
+            fingerprints[item.external_source_id] = fp
+    return results
+
+
+async def record_near_duplicate(fp: int, external_source_id: str) -> None:
+    index = get_near_dup_index()
+    if index is None:
+        return
+    index.add(fp, external_source_id)
+    await index.publish()
+
+
+async def filter_generated_task(task: StandardTask, claim: bool = True) -> Tuple[bool, str | None]:
     # Dedupe on external_source_id
-    if is_duplicate(f"task:{task.external_source_id}"):
+    if claim and await is_duplicate_async(f"task:{task.external_source_id}"):
         return False, "duplicate_task"
 
     # Optional: simple noise filtering
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .config import settings
+from .schemas import RunCounts
+
+logger = logging.getLogger(__name__)
+
+
+class SourceRun(BaseModel):
+    status: str = "pending"  # pending | running | done | failed
+    coalesced: bool = False
+    counts: Optional[RunCounts] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class RunJob(BaseModel):
+    id: str
+    status: str = "queued"  # queued | running | done | failed
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    sources: Dict[str, SourceRun] = Field(default_factory=dict)
+    totals: RunCounts = Field(default_factory=RunCounts)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class RunManager:
+    """Background /run-now jobs over the shared IngestScheduler, with progress fan-out."""
+
+    def __init__(self, scheduler) -> None:
+        self.scheduler = scheduler
+        self._jobs: "OrderedDict[str, RunJob]" = OrderedDict()
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._limit = asyncio.Semaphore(max(1, settings.RUN_MAX_CONCURRENCY))
+
+    def start(self, source_ids: Optional[List[str]] = None) -> RunJob:
+        collectors = self.scheduler.get_collectors()
+        if source_ids:
+            wanted = set(source_ids)
+            unknown = wanted - {c.id for c in collectors}
+            if unknown:
+                raise KeyError(", ".join(sorted(unknown)))
+            collectors = [c for c in collectors if c.id in wanted]
+        job = RunJob(id=uuid.uuid4().hex, sources={c.id: SourceRun() for c in collectors})
+        self._jobs[job.id] = job
+        while len(self._jobs) > max(1, settings.RUN_HISTORY_SIZE):
+            old_id, old = next(iter(self._jobs.items()))
+            if not old.finished:
+                break
+            self._jobs.pop(old_id)
+        task = asyncio.create_task(self._run(job, collectors))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _t: self._tasks.pop(job.id, None))
+        return job
+
+    def get(self, job_id: str) -> Optional[RunJob]:
+        return self._jobs.get(job_id)
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Current snapshot first, then one event per source change until the job ends."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            # A job that already ended sent its "finished" event before we subscribed
+            finished = job.finished
+            yield {"event": "snapshot", "data": job.model_dump(mode="json")}
+            if finished:
+                return
+            # Read until "finished" itself: a slow client may still have source events queued
+            while True:
+                event = await queue.get()
+                yield event
+                if event["event"] == "finished":
+                    break
+        finally:
+            subscribers = self._subscribers.get(job_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    async def aclose(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        # Cancelled jobs never reach the end of _run; close them out so pollers and streams see an end state
+        for job in self._jobs.values():
+            if job.finished:
+                continue
+            now = datetime.utcnow()
+            for entry in job.sources.values():
+                if entry.status in ("pending", "running"):
+                    entry.status = "failed"
+                    entry.error = "cancelled by shutdown"
+                    entry.finished_at = now
+            job.status = "failed"
+            job.finished_at = now
+            self._publish(job, "finished", job.model_dump(mode="json"))
+
+    def _publish(self, job: RunJob, event: str, data: Dict[str, Any]) -> None:
+        for queue in self._subscribers.get(job.id, []):
+            queue.put_nowait({"event": event, "data": data})
+
+    async def _run(self, job: RunJob, collectors: List) -> None:
+        job.status = "running"
+        self._publish(job, "status", {"status": job.status})
+        await asyncio.gather(*(self._run_source(job, c) for c in collectors))
+        job.status = "failed" if any(s.status == "failed" for s in job.sources.values()) else "done"
+        job.finished_at = datetime.utcnow()
+        self._publish(job, "finished", job.model_dump(mode="json"))
+
+    async def _run_source(self, job: RunJob, collector) -> None:
+        entry = job.sources[collector.id]
+        async with self._limit:
+            entry.status = "running"
+            entry.started_at = datetime.utcnow()
+            self._publish(job, "source", {"source_id": collector.id, **entry.model_dump(mode="json")})
+            try:
+                entry.counts, entry.coalesced = await self.scheduler.run_source(collector)
+                entry.status = "done"
+                for field, value in entry.counts:
+                    setattr(job.totals, field, getattr(job.totals, field) + value)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("Run %s: collector %s failed: %s", job.id, collector.id, exc)
+                entry.status = "failed"
+                entry.error = str(exc) or type(exc).__name__
+            entry.finished_at = datetime.utcnow()
+        self._publish(job, "source", {"source_id": collector.id, **entry.model_dump(mode="json")})
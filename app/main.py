@@ -1,17 +1,36 @@
 from __future__ import annotations
 
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import hmac
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 import orjson
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 from .config import settings
-from .db import init_db
-from .scheduler import IngestScheduler, run_once_now
+from .db import init_db, dispose_async_engine
+from .collectors.fetcher import close_fetcher
+from .utils.dedupe import close_async_redis
+from .validator.validator import close_link_validator
+from .storage.writer import close_writer
+from .ai.cache import close_generation_cache
+from .publisher.index import get_published_index
+from .publisher.outbox import get_outbox
+from .profiling import ProfileBusy, sample_stacks
+from .jobs import RunManager
+from .pipeline.queue import QueueWorkers
+from .scheduler import IngestScheduler
+from .ai.engine import load_litellm
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 
 def _orjson_dumps(v, *, default):
@@ -29,14 +48,56 @@ app = FastAPI(title=settings.APP_NAME, default_response_class=JSONResponse)
 
 @app.on_event("startup")
 async def on_startup() -> None:
+    started = time.perf_counter()
     try:
-        init_db()
+        # create_all does blocking connects and DDL; keep it off the event loop
+        await asyncio.to_thread(init_db)
     except Exception as exc:
         logger.warning("DB init skipped: %s", exc)
+    if settings.ENABLE_AI:
+        # litellm is imported lazily; pay that cost in a thread before the first generation needs it
+        app.state.litellm_warmup = asyncio.create_task(asyncio.to_thread(load_litellm))
+    index = get_published_index()
+    if index is not None:
+        # Warm in the background; until then misses simply go to the remote API
+        app.state.index_warmup = asyncio.create_task(index.warm())
+    # One scheduler per process: scheduled jobs and /run-now share its clients and in-flight runs
+    scheduler = IngestScheduler()
+    app.state.scheduler = scheduler
+    app.state.runs = RunManager(scheduler)
     if settings.SCHEDULER_ENABLED:
-        scheduler = IngestScheduler()
         scheduler.start()
         logger.info("Scheduler started")
+    if settings.QUEUE_ENABLED and settings.QUEUE_WORKERS > 0:
+        app.state.queue_workers = QueueWorkers(scheduler.task_api, scheduler.generator)
+        app.state.queue_workers.start()
+    outbox = get_outbox()
+    if outbox is not None and not settings.MOCK_PUBLISH:
+        # Drains through the scheduler's client so retries share its limiter and breaker
+        outbox.start(scheduler.task_api)
+    logger.info("Startup finished: imports %.0f ms, startup %.0f ms", _IMPORT_SECONDS * 1000, (time.perf_counter() - started) * 1000)
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    runs = getattr(app.state, "runs", None)
+    if runs is not None:
+        await runs.aclose()
+    queue_workers = getattr(app.state, "queue_workers", None)
+    if queue_workers is not None:
+        await queue_workers.close()
+    outbox = get_outbox()
+    if outbox is not None:
+        await outbox.close()
+    scheduler = getattr(app.state, "scheduler", None)
+    if scheduler is not None:
+        await scheduler.shutdown()
+    await close_fetcher()
+    await close_async_redis()
+    await close_link_validator()
+    await close_writer()
+    await close_generation_cache()
+    await dispose_async_engine()
 
 
 @app.get("/health")
@@ -54,13 +115,66 @@ async def cfg() -> Dict[str, Any]:
     return redacted
 
 
-@app.post("/run-now")
-async def run_now():
-    await run_once_now()
-    return {"status": "done"}
+@app.post("/run-now", status_code=202)
+async def run_now(source: Optional[List[str]] = Query(default=None)):
+    try:
+        job = app.state.runs.start(source)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=f"unknown source(s): {exc.args[0]}")
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"cannot load sources: {exc}")
+    return {"job_id": job.id, "status": job.status, "status_url": f"/runs/{job.id}", "events_url": f"/runs/{job.id}/events"}
+
+
+@app.get("/runs/{job_id}")
+async def get_run(job_id: str):
+    job = app.state.runs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="run not found")
+    return job.model_dump(mode="json")
+
+
+@app.get("/runs/{job_id}/events")
+async def run_events(job_id: str):
+    runs: RunManager = app.state.runs
+    if runs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="run not found")
+
+    async def stream():
+        async for event in runs.events(job_id):
+            yield f"event: {event['event']}\ndata: {orjson.dumps(event['data']).decode()}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.get("/metrics")
 async def metrics():
     data = generate_latest()
-    return PlainTextResponse(content=data.decode("utf-8"), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
+    return PlainTextResponse(content=data.decode("utf-8"), media_type=CONTENT_TYPE_LATEST)
+
+
+def _require_admin(authorization: str | None, x_admin_token: str | None) -> None:
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = x_admin_token
+    if authorization and authorization.lower().startswith("bearer "):
+        supplied = authorization[7:].strip()
+    if not supplied or not hmac.compare_digest(supplied, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="admin token required")
+
+
+@app.get("/debug/profile")
+async def debug_profile(
+    seconds: float = Query(default=5.0, gt=0),
+    idle: bool = Query(default=False),
+    authorization: str | None = Header(default=None),
+    x_admin_token: str | None = Header(default=None),
+):
+    # Folded stacks of all threads (event loop, parse and to_thread pools) while live traffic runs
+    _require_admin(authorization, x_admin_token)
+    seconds = min(seconds, settings.PROFILE_MAX_SECONDS)
+    try:
+        folded = await asyncio.to_thread(sample_stacks, seconds, 0.01, idle)
+    except ProfileBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return PlainTextResponse(content=folded)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Sequence, Union
+
+from prometheus_client import Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+METRIC_STAGE_SECONDS = Histogram(
+    "ingest_stage_duration_seconds",
+    "Time spent handling one item (or dedupe batch) per pipeline stage",
+    ["collector", "stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+METRIC_STAGE_INFLIGHT = Gauge("ingest_stage_inflight_items", "Items currently being handled by a stage", ["collector", "stage"])
+METRIC_QUEUE_DEPTH = Gauge("ingest_stage_queue_depth", "Items waiting in a stage's input queue", ["collector", "stage"])
+
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    name: str
+    # Returns the value handed to the next stage, or None to drop the item
+    handler: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+    # When set, the handler returns an iterable and each element moves on separately
+    fan_out: bool = False
+
+
+async def _read_ahead(items: AsyncIterable[Any], buffer: asyncio.Queue) -> None:
+    try:
+        async for item in items:
+            await buffer.put((item, None))
+    except Exception as exc:
+        await buffer.put((_STOP, exc))
+        return
+    await buffer.put((_STOP, None))
+
+
+async def run_stages(
+    items: Union[Iterable[Any], AsyncIterable[Any]],
+    stages: Sequence[Stage],
+    queue_size: int = 100,
+    collector: str = "unknown",
+    read_ahead: int = 100,
+) -> None:
+    if not stages:
+        return
+    queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=max(1, queue_size)) for _ in stages]
+    depth = [METRIC_QUEUE_DEPTH.labels(collector=collector, stage=s.name) for s in stages]
+
+    async def put(index: int, item: Any) -> None:
+        await queues[index].put(item)
+        depth[index].set(queues[index].qsize())
+
+    async def worker(index: int) -> None:
+        stage = stages[index]
+        inbox = queues[index]
+        duration = METRIC_STAGE_SECONDS.labels(collector=collector, stage=stage.name)
+        inflight = METRIC_STAGE_INFLIGHT.labels(collector=collector, stage=stage.name)
+        has_next = index + 1 < len(stages)
+        while True:
+            item = await inbox.get()
+            depth[index].set(inbox.qsize())
+            if item is _STOP:
+                return
+            inflight.inc()
+            start = time.perf_counter()
+            try:
+                result = await stage.handler(item)
+            except Exception as exc:
+                logger.exception("Stage %s failed: %s", stage.name, exc)
+                continue
+            finally:
+                duration.observe(time.perf_counter() - start)
+                inflight.dec()
+            if result is None or not has_next:
+                continue
+            if stage.fan_out:
+                for each in result:
+                    await put(index + 1, each)
+            else:
+                await put(index + 1, result)
+
+    pools = [[asyncio.create_task(worker(i)) for _ in range(max(1, s.workers))] for i, s in enumerate(stages)]
+    reader: Optional[asyncio.Task] = None
+    source_error: Optional[BaseException] = None
+    try:
+        # Bounded stage queues give backpressure to the feeder below
+        try:
+            if isinstance(items, AsyncIterable):
+                # An async source (a streaming parser) is read up to read_ahead elements ahead
+                # of the first stage, so a slow pipeline does not stall the download of an
+                # ordinary feed; past that the source waits, keeping its connection open,
+                # rather than buffering an arbitrarily large feed in memory
+                buffer: asyncio.Queue = asyncio.Queue(maxsize=max(1, read_ahead))
+                reader = asyncio.create_task(_read_ahead(items, buffer))
+                while True:
+                    item, error = await buffer.get()
+                    if item is _STOP:
+                        source_error = error
+                        break
+                    await put(0, item)
+            else:
+                for item in items:
+                    await put(0, item)
+        except Exception as exc:
+            source_error = exc
+        # Ordered shutdown: a stage is stopped only after everything upstream has drained
+        # into it. Also on a source error: items already fed may hold claimed dedupe keys
+        # and must finish, or later runs would skip them as duplicates
+        for index, pool in enumerate(pools):
+            for _ in pool:
+                await queues[index].put(_STOP)
+            await asyncio.gather(*pool)
+        if source_error is not None:
+            raise source_error
+    finally:
+        if reader is not None and not reader.done():
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+        for pool in pools:
+            for task in pool:
+                if not task.done():
+                    task.cancel()
+        for gauge in depth:
+            gauge.set(0)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+from collections import defaultdict
+from typing import Dict, List, Sequence, Set, Tuple
+
+import orjson
+from prometheus_client import Counter, Gauge
+
+from ..config import settings
+from ..schemas import FeedItem
+from ..utils.dedupe import get_async_redis
+from .runner import process_items
+
+logger = logging.getLogger(__name__)
+
+METRIC_QUEUE_LENGTH = Gauge("ingest_queue_length", "Entries in the collected-items stream")
+METRIC_QUEUE_PENDING = Gauge("ingest_queue_pending", "Entries delivered to a consumer but not yet acknowledged")
+METRIC_QUEUE_LAG = Gauge("ingest_queue_lag", "Entries not yet delivered to the consumer group")
+METRIC_QUEUE_ENQUEUED = Counter("ingest_queue_enqueued", "Collected items appended to the stream", ["collector"])
+METRIC_QUEUE_ACKED = Counter("ingest_queue_acked", "Stream entries processed and acknowledged")
+METRIC_QUEUE_RECLAIMED = Counter("ingest_queue_reclaimed", "Pending entries taken over from idle consumers")
+
+
+async def enqueue_items(items: Sequence[FeedItem]) -> int:
+    if not items:
+        return 0
+    pipe = get_async_redis().pipeline(transaction=False)
+    for item in items:
+        pipe.xadd(
+            settings.QUEUE_STREAM,
+            {"item": orjson.dumps(item.to_dict())},
+            maxlen=settings.QUEUE_MAXLEN,
+            approximate=True,
+        )
+    await pipe.execute()
+    METRIC_QUEUE_ENQUEUED.labels(collector=items[0].source_id).inc(len(items))
+    return len(items)
+
+
+async def ensure_group() -> None:
+    try:
+        await get_async_redis().xgroup_create(settings.QUEUE_STREAM, settings.QUEUE_GROUP, id="0", mkstream=True)
+    except Exception as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+def _decode(entries) -> Tuple[Dict[str, List[FeedItem]], Dict[str, List[str]], List[str]]:
+    items: Dict[str, List[FeedItem]] = defaultdict(list)
+    ids: Dict[str, List[str]] = defaultdict(list)
+    bad: List[str] = []
+    for entry_id, fields in entries:
+        # XAUTOCLAIM returns entries deleted by trimming with empty fields
+        raw = (fields or {}).get("item")
+        try:
+            item = FeedItem.from_dict(orjson.loads(raw))
+        except Exception:
+            logger.warning("Dropping undecodable stream entry %s", entry_id)
+            bad.append(entry_id)
+            continue
+        items[item.source_id].append(item)
+        ids[item.source_id].append(entry_id)
+    return items, ids, bad
+
+
+class QueueWorker:
+    """One consumer in the stream's consumer group running dedupe -> generate -> validate -> publish.
+
+    An entry is acknowledged only once its item reached a final outcome (published,
+    deferred, already existing, filtered or rejected). Items whose generation, lookup or
+    publish raised, and crashed batches, stay pending; another consumer takes them over
+    with XAUTOCLAIM once they have been idle for QUEUE_CLAIM_IDLE_MS.
+    """
+
+    def __init__(self, name: str, task_api, generator) -> None:
+        self.name = name
+        self.task_api = task_api
+        self.generator = generator
+
+    async def _process(self, entries, redelivered: bool) -> None:
+        redis = get_async_redis()
+        items, ids, bad = _decode(entries)
+        if bad:
+            await redis.xack(settings.QUEUE_STREAM, settings.QUEUE_GROUP, *bad)
+
+        async def one(source_id: str) -> None:
+            handled: Set[str] = set()
+            try:
+                await process_items(
+                    items[source_id],
+                    self.task_api,
+                    self.generator,
+                    collector_id=source_id,
+                    redelivered=redelivered,
+                    handled=handled,
+                )
+            except Exception as exc:
+                # Left pending; it will be reclaimed and retried
+                logger.exception("Queue batch for %s failed: %s", source_id, exc)
+                return
+            done = [
+                entry_id
+                for entry_id, item in zip(ids[source_id], items[source_id])
+                if item.external_source_id in handled
+            ]
+            if done:
+                await redis.xack(settings.QUEUE_STREAM, settings.QUEUE_GROUP, *done)
+                METRIC_QUEUE_ACKED.inc(len(done))
+            if len(done) < len(ids[source_id]):
+                logger.warning(
+                    "Queue batch for %s: %d of %d entries left pending for retry",
+                    source_id,
+                    len(ids[source_id]) - len(done),
+                    len(ids[source_id]),
+                )
+
+        await asyncio.gather(*(one(source_id) for source_id in items))
+
+    async def _reclaim(self) -> None:
+        start = "0-0"
+        while True:
+            result = await get_async_redis().xautoclaim(
+                settings.QUEUE_STREAM,
+                settings.QUEUE_GROUP,
+                self.name,
+                min_idle_time=settings.QUEUE_CLAIM_IDLE_MS,
+                start_id=start,
+                count=settings.QUEUE_READ_COUNT,
+            )
+            start, entries = result[0], result[1]
+            if entries:
+                METRIC_QUEUE_RECLAIMED.inc(len(entries))
+                logger.info("Consumer %s reclaimed %d pending entries", self.name, len(entries))
+                await self._process(entries, redelivered=True)
+            if start in ("0-0", b"0-0") or not entries:
+                return
+
+    async def run(self) -> None:
+        await ensure_group()
+        loop = asyncio.get_running_loop()
+        next_reclaim = 0.0
+        while True:
+            try:
+                if loop.time() >= next_reclaim:
+                    await self._reclaim()
+                    next_reclaim = loop.time() + settings.QUEUE_CLAIM_IDLE_MS / 1000 / 2
+                response = await get_async_redis().xreadgroup(
+                    settings.QUEUE_GROUP,
+                    self.name,
+                    {settings.QUEUE_STREAM: ">"},
+                    count=settings.QUEUE_READ_COUNT,
+                    block=settings.QUEUE_BLOCK_MS or None,
+                )
+                if not response and not settings.QUEUE_BLOCK_MS:
+                    await asyncio.sleep(0.5)
+                for _stream, entries in response or []:
+                    await self._process(entries, redelivered=False)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Queue consumer %s error: %s", self.name, exc)
+                await asyncio.sleep(1)
+
+
+async def update_queue_metrics() -> None:
+    redis = get_async_redis()
+    METRIC_QUEUE_LENGTH.set(await redis.xlen(settings.QUEUE_STREAM))
+    for group in await redis.xinfo_groups(settings.QUEUE_STREAM):
+        if group.get("name") == settings.QUEUE_GROUP:
+            METRIC_QUEUE_PENDING.set(group.get("pending") or 0)
+            # "lag" needs Redis 7+
+            if group.get("lag") is not None:
+                METRIC_QUEUE_LAG.set(group["lag"])
+
+
+async def remove_consumers(names: Set[str] | None = None, min_idle_ms: int = 0) -> None:
+    """XGROUP DELCONSUMER for consumers that own no pending entries.
+
+    Names include the pid, so every restart would otherwise leave its consumers in the
+    group. Ones still owning entries stay until XAUTOCLAIM has moved those elsewhere.
+    """
+    redis = get_async_redis()
+    try:
+        for consumer in await redis.xinfo_consumers(settings.QUEUE_STREAM, settings.QUEUE_GROUP):
+            if names is not None and consumer.get("name") not in names:
+                continue
+            if consumer.get("pending") or (consumer.get("idle") or 0) < min_idle_ms:
+                continue
+            await redis.xgroup_delconsumer(settings.QUEUE_STREAM, settings.QUEUE_GROUP, consumer["name"])
+    except Exception as exc:
+        logger.warning("Could not remove queue consumers: %s", exc)
+
+
+class QueueWorkers:
+    def __init__(self, task_api, generator, count: int | None = None) -> None:
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        count = settings.QUEUE_WORKERS if count is None else count
+        self.workers = [QueueWorker(f"{prefix}:{i}", task_api, generator) for i in range(count)]
+        self._tasks: List[asyncio.Task] = []
+
+    async def _metrics_loop(self) -> None:
+        while True:
+            try:
+                await update_queue_metrics()
+                # Consumers of crashed processes: their entries were reclaimed after QUEUE_CLAIM_IDLE_MS
+                await remove_consumers(min_idle_ms=2 * settings.QUEUE_CLAIM_IDLE_MS)
+            except Exception as exc:
+                logger.debug("Queue metrics update failed: %s", exc)
+            await asyncio.sleep(15)
+
+    def start(self) -> None:
+        if self._tasks or not self.workers:
+            return
+        self._tasks = [asyncio.create_task(w.run()) for w in self.workers]
+        self._tasks.append(asyncio.create_task(self._metrics_loop()))
+        logger.info("Started %d queue consumers on %s", len(self.workers), settings.QUEUE_STREAM)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._tasks:
+            await remove_consumers(names={w.name for w in self.workers})
+        self._tasks = []
@@ -1,59 +1,255 @@
 from __future__ import annotations
 
 import logging
-from typing import List
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional, Set, Union
 
-from ..schemas import CollectedItem, StandardTask
+from ..config import settings
+from ..schemas import FeedItem, RunCounts, StandardTask
 from ..ai.generator import TaskGenerator
-from ..filters.rules import filter_collected_item, filter_generated_task
+from ..ai.preprocess import preprocess_item
+from ..filters.rules import (
+    filter_collected_items,
+    filter_generated_task,
+    filter_near_duplicates,
+    record_near_duplicate,
+)
 from ..validator.validator import validate_task
 from ..publisher.client import TaskApiClient
+from ..publisher.index import get_published_index
+from ..publisher.outbox import get_outbox
+from ..storage.writer import get_writer
+from .engine import METRIC_STAGE_SECONDS, Stage, run_stages
 
 from prometheus_client import Counter
+from pydantic import ValidationError
 
 logger = logging.getLogger(__name__)
 
-METRIC_COLLECTED = Counter("ingest_collected_items", "Items collected", ["collector"]) 
-METRIC_FILTERED = Counter("ingest_filtered_items", "Items filtered", ["stage", "reason"]) 
+METRIC_COLLECTED = Counter("ingest_collected_items", "Items collected", ["collector"])
+METRIC_FILTERED = Counter("ingest_filtered_items", "Items filtered", ["stage", "reason"])
 METRIC_TASKS_PUBLISHED = Counter("ingest_published_tasks", "Tasks published")
-METRIC_TASKS_FAILED = Counter("ingest_publish_failures", "Task publish failures", ["reason"]) 
+METRIC_TASKS_FAILED = Counter("ingest_publish_failures", "Task publish failures", ["reason"])
 
 
-def run_collector(collector) -> List[CollectedItem]:
-    items = collector.collect()
-    METRIC_COLLECTED.labels(collector=collector.id).inc(len(items))
-    return items
+async def stream_collector(collector) -> AsyncIterator[FeedItem]:
+    """Items from ``collector.stream()`` as they are parsed, counted per collector.
 
+    The fetch duration covers the whole stream, including time spent paused while the
+    pipeline applies backpressure.
+    """
+    start = time.perf_counter()
+    collected = METRIC_COLLECTED.labels(collector=collector.id)
+    try:
+        async for item in collector.stream():
+            collected.inc()
+            yield item
+    finally:
+        METRIC_STAGE_SECONDS.labels(collector=collector.id, stage="fetch").observe(time.perf_counter() - start)
 
-async def process_items(items: List[CollectedItem], task_api: TaskApiClient, generator: TaskGenerator) -> None:
-    for item in items:
-        ok, reason = filter_collected_item(item)
-        if not ok:
-            METRIC_FILTERED.labels(stage="collect", reason=reason or "unknown").inc()
-            continue
 
-        task: StandardTask = generator.generate(item)
+async def _ramped_batches(items: AsyncIterable[FeedItem], size: int, counts: RunCounts) -> AsyncIterator[List[FeedItem]]:
+    # Start with single items so the first ones reach generation while the feed is still
+    # downloading, then double up to DEDUPE_BATCH_SIZE (one Redis round trip per batch)
+    batch: List[FeedItem] = []
+    target = 1
+    async for item in items:
+        counts.collected += 1
+        batch.append(item)
+        if len(batch) >= target:
+            yield batch
+            batch = []
+            target = min(size, target * 2)
+    if batch:
+        yield batch
+
+
+def _stage_workers(workers: int, batch_size: int, batching: bool) -> int:
+    # A MicroBatcher only fills when that many submits are in flight at once; with fewer
+    # workers every batch is short and still waits out the whole window
+    return max(workers, batch_size) if batching and batch_size > 1 else workers
+
+
+async def process_items(
+    items: Union[List[FeedItem], AsyncIterable[FeedItem]],
+    task_api: TaskApiClient,
+    generator: TaskGenerator,
+    collector_id: str | None = None,
+    redelivered: bool = False,
+    handled: Optional[Set[str]] = None,
+) -> RunCounts:
+    """Run items through dedupe -> generate -> validate -> exists -> publish.
+
+    Per-item errors are logged by the pipeline and do not fail the run. Pass
+    ``handled`` to learn which items reached a final outcome (published, deferred,
+    already existing, filtered or rejected): their external_source_ids are added to it,
+    and items missing from it failed and are worth retrying.
+    """
+    # Redelivered queue entries already claimed their dedupe keys on the first attempt;
+    # re-claiming would drop them, so rely on the exists check to avoid double publishing
+    claim = not redelivered
+    streamed = isinstance(items, AsyncIterable)
+    collector_id = collector_id or (items[0].source_id if not streamed and items else "unknown")
+    counts = RunCounts(collected=0 if streamed else len(items))
+    writer = get_writer()
+    index = get_published_index()
+    outbox = get_outbox()
+    # Outcome tracking by external_source_id. A copy dropped as a duplicate of an item
+    # accepted in this same run shares that item's fate, so it is settled only at the end
+    accepted: Set[str] = set()
+    dropped: Set[str] = set()
+    done: Set[str] = set()
+    # Near-duplicate fingerprints of accepted items, recorded once their task exists
+    story_fps: Dict[str, int] = {}
 
-        ok2, reason2 = filter_generated_task(task)
-        if not ok2:
-            METRIC_FILTERED.labels(stage="generate", reason=reason2 or "unknown").inc()
-            continue
+    async def story_settled(external_source_id: str) -> None:
+        fp = story_fps.pop(external_source_id, None)
+        if fp is not None:
+            await record_near_duplicate(fp, external_source_id)
 
-        valid, reason3 = await validate_task(task)
+    async def dedupe(batch: List[FeedItem]) -> List[FeedItem]:
+        unique: List[FeedItem] = []
+        for item, (ok, reason) in zip(batch, await filter_collected_items(batch, claim=claim)):
+            if not ok:
+                METRIC_FILTERED.labels(stage="collect", reason=reason or "unknown").inc()
+                counts.filtered += 1
+                dropped.add(item.external_source_id)
+                continue
+            unique.append(item)
+        kept: List[FeedItem] = []
+        for item, (ok, reason) in zip(unique, await filter_near_duplicates(unique, story_fps)):
+            if not ok:
+                METRIC_FILTERED.labels(stage="collect", reason=reason or "unknown").inc()
+                counts.filtered += 1
+                dropped.add(item.external_source_id)
+                continue
+            accepted.add(item.external_source_id)
+            kept.append(item)
+            if writer is not None:
+                writer.add_source_item(item)
+        return kept
+
+    async def preprocess(item: FeedItem) -> FeedItem:
+        # After dedupe, so the stored raw_content and the near-dup check see the original summary
+        return preprocess_item(item)
+
+    async def generate(item: FeedItem) -> Optional[StandardTask]:
+        try:
+            task: StandardTask = await generator.generate(item)
+        except ValidationError:
+            # FeedItems are not validated; a malformed URL first fails here
+            METRIC_FILTERED.labels(stage="generate", reason="invalid_task").inc()
+            counts.filtered += 1
+            done.add(item.external_source_id)
+            return None
+        ok, reason = await filter_generated_task(task, claim=claim)
+        if not ok:
+            METRIC_FILTERED.labels(stage="generate", reason=reason or "unknown").inc()
+            counts.filtered += 1
+            done.add(task.external_source_id)
+            return None
+        if writer is not None:
+            writer.add_task(task)
+        return task
+
+    async def validate(task: StandardTask) -> Optional[StandardTask]:
+        valid, reason = await validate_task(task)
         if not valid:
-            METRIC_FILTERED.labels(stage="validate", reason=reason3 or "unknown").inc()
-            continue
+            METRIC_FILTERED.labels(stage="validate", reason=reason or "unknown").inc()
+            counts.filtered += 1
+            done.add(task.external_source_id)
+            if writer is not None:
+                writer.set_status(task.external_source_id, "invalid")
+            return None
+        return task
 
-        # Optional: check existence by external_source_id
-        existing_id = await task_api.find_existing_by_external_id(task.external_source_id)
+    async def check_exists(task: StandardTask) -> Optional[StandardTask]:
+        # Ids we published ourselves are answered locally; only misses go to the API
+        existing_id = index.get(task.external_source_id) if index is not None else None
+        if not existing_id:
+            existing_id = await task_api.find_existing_by_external_id(task.external_source_id)
+            if existing_id and index is not None:
+                await index.add(task.external_source_id, existing_id)
         if existing_id:
             METRIC_FILTERED.labels(stage="publish", reason="already_exists").inc()
-            continue
+            counts.existing += 1
+            done.add(task.external_source_id)
+            await story_settled(task.external_source_id)
+            if writer is not None:
+                writer.set_status(task.external_source_id, "published", existing_id)
+            return None
+        return task
 
+    async def publish(task: StandardTask) -> None:
         result = await task_api.publish(task)
         if result.success:
             METRIC_TASKS_PUBLISHED.inc()
+            counts.published += 1
             logger.info("Published task id=%s title=%s", result.task_id, task.title)
+            if index is not None:
+                await index.add(task.external_source_id, result.task_id)
+            status = "published"
+        elif result.retryable and outbox is not None and await outbox.defer(task, result.error):
+            # Dedupe keys are already claimed, so this is the task's only way back
+            counts.deferred += 1
+            status = "deferred"
+            logger.info("Publish deferred to outbox: %s", result.error)
         else:
             METRIC_TASKS_FAILED.labels(reason=result.error or "unknown").inc()
-            logger.warning("Publish failed: %s", result.error)
\ No newline at end of file
+            counts.failed += 1
+            status = "failed"
+            logger.warning("Publish failed: %s", result.error)
+        if status != "failed":
+            await story_settled(task.external_source_id)
+        # A retryable failure with nowhere to defer it stays unsettled, so a queue entry is retried
+        if status != "failed" or not result.retryable:
+            done.add(task.external_source_id)
+        if writer is not None:
+            writer.set_status(task.external_source_id, status, result.task_id)
+
+    batching_api = not settings.MOCK_PUBLISH
+    stages = [
+        Stage("dedupe", dedupe, workers=settings.PIPELINE_DEDUPE_WORKERS, fan_out=True),
+        *([Stage("preprocess", preprocess)] if settings.PREPROCESS_ENABLED else []),
+        Stage(
+            "generate",
+            generate,
+            workers=_stage_workers(settings.PIPELINE_GENERATE_WORKERS, settings.LLM_BATCH_SIZE, generator.enabled),
+        ),
+        Stage("validate", validate, workers=settings.PIPELINE_VALIDATE_WORKERS),
+        Stage(
+            "exists",
+            check_exists,
+            workers=_stage_workers(
+                settings.PIPELINE_EXISTS_WORKERS,
+                settings.TASK_API_BULK_EXISTS_SIZE,
+                batching_api and settings.TASK_API_BULK_EXISTS,
+            ),
+        ),
+        Stage(
+            "publish",
+            publish,
+            workers=_stage_workers(
+                settings.PIPELINE_PUBLISH_WORKERS,
+                settings.TASK_API_BATCH_SIZE,
+                batching_api and settings.TASK_API_BATCH_ENABLED,
+            ),
+        ),
+    ]
+    # Dedupe works on whole batches so each one costs a single Redis round trip
+    size = max(1, settings.DEDUPE_BATCH_SIZE)
+    if streamed:
+        batches = _ramped_batches(items, size, counts)
+    else:
+        batches = [items[i : i + size] for i in range(0, len(items), size)]
+    await run_stages(
+        batches,
+        stages,
+        queue_size=settings.PIPELINE_QUEUE_SIZE,
+        collector=collector_id,
+        read_ahead=max(1, settings.FEED_READ_AHEAD_ITEMS // size),
+    )
+    if handled is not None:
+        handled.update(done)
+        handled.update(dropped - accepted)
+    return counts
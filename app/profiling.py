@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+_lock = threading.Lock()
+# Innermost frames of threads that are parked rather than doing work
+_IDLE = {("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get")}
+
+
+class ProfileBusy(RuntimeError):
+    pass
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def sample_stacks(seconds: float, interval: float = 0.01, include_idle: bool = False) -> str:
+    """Sample every thread's stack for `seconds` and return them in collapsed (folded) form.
+
+    Each output line is `thread;outer;...;inner count`, ready for flamegraph.pl or speedscope.
+    Blocking; run it in a worker thread so the sampled event loop keeps running.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfileBusy("a profile is already running")
+    try:
+        me = threading.get_ident()
+        counts: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if not include_idle and (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE:
+                    continue
+                stack = []
+                f: Optional[FrameType] = frame
+                while f is not None:
+                    stack.append(_frame_label(f))
+                    f = f.f_back
+                stack.append(names.get(ident, str(ident)))
+                counts[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return "\n".join(f"{stack} {n}" for stack, n in counts.most_common()) + "\n"
+    finally:
+        _lock.release()
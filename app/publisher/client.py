@@ -1,9 +1,28 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
 import httpx
 from ..config import settings
 from ..schemas import StandardTask, PublishResult
+from ..utils.batching import MicroBatcher
+from .resilience import make_breaker, make_limiter
+
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except Exception:  # pragma: no cover
+    _HTTP2_AVAILABLE = False
+
+# Status codes meaning the bulk endpoint does not exist on this API
+_BATCH_UNSUPPORTED = (404, 405, 501)
+# Failures that say nothing about the task itself; worth retrying later from the outbox
+_RETRYABLE_STATUS = (408, 425, 429)
+
+
+def _retryable(status_code: int) -> bool:
+    return status_code >= 500 or status_code in _RETRYABLE_STATUS
 
 
 class TaskApiClient:
@@ -12,6 +31,27 @@ class TaskApiClient:
         self.token = settings.TASK_API_TOKEN
         self.timeout = settings.TASK_API_TIMEOUT_SECONDS
         self.mock = settings.MOCK_PUBLISH
+        self._client: Optional[httpx.AsyncClient] = None
+        self._batcher: Optional[MicroBatcher[StandardTask, PublishResult]] = None
+        if settings.TASK_API_BATCH_ENABLED:
+            self._batcher = MicroBatcher(
+                self._publish_batch,
+                max_size=settings.TASK_API_BATCH_SIZE,
+                max_wait_seconds=settings.TASK_API_BATCH_WINDOW_MS / 1000,
+                eager=True,
+            )
+        # Shared by publishes, batches and lookups: they all load the same API
+        self.limiter = make_limiter()
+        self.breaker = make_breaker()
+        # None until the bulk endpoint has been tried once
+        self._batch_supported: Optional[bool] = None
+        self._lookup_batcher: Optional[MicroBatcher[str, Optional[str]]] = None
+        if settings.TASK_API_BULK_EXISTS:
+            self._lookup_batcher = MicroBatcher(
+                self._find_existing_many,
+                max_size=settings.TASK_API_BULK_EXISTS_SIZE,
+                max_wait_seconds=settings.TASK_API_BATCH_WINDOW_MS / 1000,
+            )
 
     def _headers(self) -> Dict[str, str]:
         headers = {"Content-Type": "application/json"}
@@ -19,6 +59,56 @@ class TaskApiClient:
             headers["Authorization"] = f"Bearer {self.token}"
         return headers
 
+    def _get_client(self) -> httpx.AsyncClient:
+        # One keep-alive pool for the lifetime of the client instead of a handshake per call
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers=self._headers(),
+                http2=settings.TASK_API_HTTP2 and _HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.TASK_API_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.TASK_API_MAX_KEEPALIVE,
+                ),
+            )
+        return self._client
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        # Raises CircuitOpenError without touching the network while the API is failing
+        self.breaker.before_call()
+        recorded = False
+        try:
+            async with self.limiter.slot():
+                start = time.perf_counter()
+                try:
+                    resp = await self._get_client().request(method, url, **kwargs)
+                except httpx.TransportError:
+                    # Timeouts and connection failures count against the API
+                    recorded = True
+                    self._record(time.perf_counter() - start, False)
+                    raise
+            recorded = True
+            self._record(time.perf_counter() - start, not _retryable(resp.status_code))
+            return resp
+        finally:
+            if not recorded:
+                # Cancelled (shutdown, an aborted run) or failed on our side: says nothing
+                # about the API, but a half-open probe must not stay taken
+                self.breaker.release()
+
+    def _record(self, latency: float, ok: bool) -> None:
+        self.limiter.record(latency, ok)
+        self.breaker.record(ok)
+
+    async def aclose(self) -> None:
+        if self._batcher is not None:
+            await self._batcher.aclose()
+        if self._lookup_batcher is not None:
+            await self._lookup_batcher.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     def _task_payload(self, task: StandardTask) -> Dict[str, Any]:
         return {
             "title": task.title,
@@ -34,42 +124,114 @@ class TaskApiClient:
             "meta": task.meta,
         }
 
+    @staticmethod
+    def _task_id(data: Dict[str, Any]) -> str:
+        return str(data.get("id") or data.get("task_id") or data.get("data", {}).get("id"))
+
     async def publish(self, task: StandardTask) -> PublishResult:
         if self.mock:
             # Simulate success and echo a fake id
             fake_id = f"mock-{task.external_source_id[:12]}"
             return PublishResult(success=True, task_id=fake_id)
+        if self._batcher is not None:
+            return await self._batcher.submit(task)
+        return await self._publish_one(task)
+
+    async def _publish_one(self, task: StandardTask) -> PublishResult:
         url = f"{self.base_url}/tasks"
-        async with httpx.AsyncClient(timeout=self.timeout, headers=self._headers()) as client:
-            try:
-                resp = await client.post(url, json=self._task_payload(task))
-                if resp.status_code in (200, 201):
-                    data = resp.json()
-                    task_id = str(data.get("id") or data.get("task_id") or data.get("data", {}).get("id"))
-                    return PublishResult(success=True, task_id=task_id)
-                else:
-                    return PublishResult(success=False, error=f"status={resp.status_code} body={resp.text}")
-            except Exception as exc:
-                return PublishResult(success=False, error=str(exc))
+        try:
+            resp = await self._request("POST", url, json=self._task_payload(task))
+            if resp.status_code in (200, 201):
+                return PublishResult(success=True, task_id=self._task_id(resp.json()))
+            else:
+                return PublishResult(
+                    success=False,
+                    error=f"status={resp.status_code} body={resp.text}",
+                    retryable=_retryable(resp.status_code),
+                )
+        except Exception as exc:
+            return PublishResult(success=False, error=str(exc), retryable=True)
+
+    async def _publish_each(self, tasks: List[StandardTask]) -> List[PublishResult]:
+        return list(await asyncio.gather(*(self._publish_one(t) for t in tasks)))
+
+    async def _publish_batch(self, tasks: List[StandardTask]) -> List[PublishResult]:
+        if self._batch_supported is False:
+            return await self._publish_each(tasks)
+        url = f"{self.base_url}/tasks/batch"
+        try:
+            resp = await self._request("POST", url, json={"tasks": [self._task_payload(t) for t in tasks]})
+        except Exception as exc:
+            return [PublishResult(success=False, error=str(exc), retryable=True) for _ in tasks]
+        if resp.status_code in _BATCH_UNSUPPORTED:
+            self._batch_supported = False
+            return await self._publish_each(tasks)
+        if resp.status_code not in (200, 201):
+            error = f"status={resp.status_code} body={resp.text}"
+            return [PublishResult(success=False, error=error, retryable=_retryable(resp.status_code)) for _ in tasks]
+        self._batch_supported = True
+
+        data = resp.json()
+        if isinstance(data, dict):
+            created = data.get("items") or data.get("data") or data.get("results") or []
+        else:
+            created = data
+        if not isinstance(created, list) or len(created) != len(tasks):
+            # Cannot map ids back to tasks reliably; a retry re-checks existence before publishing
+            return [PublishResult(success=False, error="batch_response_mismatch", retryable=True) for _ in tasks]
+        results: List[PublishResult] = []
+        for entry in created:
+            if not isinstance(entry, dict) or entry.get("error"):
+                error = entry.get("error") if isinstance(entry, dict) else "batch_item_invalid"
+                results.append(PublishResult(success=False, error=str(error)))
+            else:
+                results.append(PublishResult(success=True, task_id=self._task_id(entry)))
+        return results
 
     async def find_existing_by_external_id(self, external_source_id: str) -> Optional[str]:
         if self.mock:
             return None
+        if self._lookup_batcher is not None:
+            return await self._lookup_batcher.submit(external_source_id)
+        return await self._find_existing_one(external_source_id)
+
+    @staticmethod
+    def _items(data: Any) -> List[Dict[str, Any]]:
+        if isinstance(data, dict):
+            return data.get("items") or data.get("data") or []
+        return data or []
+
+    async def _find_existing_one(self, external_source_id: str) -> Optional[str]:
         # If the API supports querying by external id; otherwise return None
         url = f"{self.base_url}/tasks"
         params = {"external_source_id": external_source_id}
-        async with httpx.AsyncClient(timeout=self.timeout, headers=self._headers()) as client:
-            try:
-                resp = await client.get(url, params=params)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    if isinstance(data, dict):
-                        items = data.get("items") or data.get("data") or []
-                    else:
-                        items = data
-                    if items:
-                        any_item = items[0]
-                        return str(any_item.get("id") or any_item.get("task_id"))
-                return None
-            except Exception:
-                return None
\ No newline at end of file
+        try:
+            resp = await self._request("GET", url, params=params)
+            if resp.status_code == 200:
+                items = self._items(resp.json())
+                if items:
+                    any_item = items[0]
+                    return str(any_item.get("id") or any_item.get("task_id"))
+            return None
+        except Exception:
+            return None
+
+    async def _find_existing_many(self, external_source_ids: List[str]) -> List[Optional[str]]:
+        if len(external_source_ids) == 1:
+            return [await self._find_existing_one(external_source_ids[0])]
+        # One query for the whole group: ?external_source_id=a,b,c
+        url = f"{self.base_url}/tasks"
+        params = {"external_source_id": ",".join(external_source_ids)}
+        found: Dict[str, str] = {}
+        try:
+            resp = await self._request("GET", url, params=params)
+            if resp.status_code != 200:
+                return [None] * len(external_source_ids)
+            for item in self._items(resp.json()):
+                source = item.get("source") or {}
+                ext_id = item.get("external_source_id") or source.get("external_source_id")
+                if ext_id:
+                    found.setdefault(str(ext_id), str(item.get("id") or item.get("task_id")))
+        except Exception:
+            return [None] * len(external_source_ids)
+        return [found.get(ext_id) for ext_id in external_source_ids]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+
+from ..config import settings
+from ..db import get_async_engine
+from ..models import GeneratedTask
+from ..utils.dedupe import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "published:ids:"
+_DAY = 86400
+
+
+def _redis_key(day: int) -> str:
+    return f"{REDIS_KEY_PREFIX}{day}"
+
+
+class PublishedIndex:
+    """external_source_id -> published task id for what this service published recently.
+
+    Backed by the generated_tasks table and day-bucketed Redis hashes shared between
+    replicas; only ids missing here need a remote existence check. The memory tier is
+    an LRU of PUBLISHED_INDEX_MAX_ENTRIES and the Redis buckets expire with the dedupe
+    TTL, past which the dedupe keys are gone too and the API check is the authority.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self._ids: "OrderedDict[str, str]" = OrderedDict()
+        self.warmed = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _remember(self, external_source_id: str, task_id: str) -> None:
+        self._ids[external_source_id] = task_id
+        self._ids.move_to_end(external_source_id)
+        while len(self._ids) > self.max_entries:
+            self._ids.popitem(last=False)
+
+    def get(self, external_source_id: str) -> Optional[str]:
+        task_id = self._ids.get(external_source_id)
+        if task_id is not None:
+            self._ids.move_to_end(external_source_id)
+        return task_id
+
+    async def add(self, external_source_id: str, task_id: Optional[str]) -> None:
+        task_id = task_id or "unknown"
+        self._remember(external_source_id, task_id)
+        key = _redis_key(int(time.time()) // _DAY)
+        try:
+            pipe = get_async_redis().pipeline(transaction=False)
+            pipe.hset(key, external_source_id, task_id)
+            # One spare day so a bucket outlives the last dedupe key written that day
+            pipe.expire(key, (settings.DUP_TTL_DAYS + 1) * _DAY)
+            await pipe.execute()
+        except Exception as exc:
+            logger.debug("Published index Redis write failed: %s", exc)
+
+    async def warm(self) -> None:
+        loaded = 0
+        rows: List[Tuple[str, str]] = []
+        try:
+            async with get_async_engine().connect() as conn:
+                stmt = (
+                    select(GeneratedTask.external_source_id, GeneratedTask.published_task_id)
+                    .where(GeneratedTask.published_task_id.isnot(None))
+                    .order_by(GeneratedTask.created_at.desc())
+                    .limit(self.max_entries)
+                )
+                result = await conn.stream(stmt.execution_options(yield_per=5000))
+                async for ext_id, task_id in result:
+                    rows.append((ext_id, task_id))
+        except Exception as exc:
+            logger.warning("Published index DB warm-up skipped: %s", exc)
+        # Oldest first, so the LRU evicts in age order
+        for ext_id, task_id in reversed(rows):
+            self._remember(ext_id, task_id)
+        loaded += len(rows)
+        try:
+            today = int(time.time()) // _DAY
+            redis = get_async_redis()
+            for day in range(today - settings.DUP_TTL_DAYS, today + 1):
+                async for ext_id, task_id in redis.hscan_iter(_redis_key(day), count=5000):
+                    self._remember(ext_id, task_id)
+                    loaded += 1
+        except Exception as exc:
+            logger.warning("Published index Redis warm-up skipped: %s", exc)
+        self.warmed = True
+        logger.info("Published index warmed with %d ids (%d kept)", loaded, len(self._ids))
+
+
+_index: PublishedIndex | None = None
+
+
+def get_published_index() -> PublishedIndex | None:
+    global _index
+    if not settings.PUBLISHED_INDEX_ENABLED:
+        return None
+    if _index is None:
+        _index = PublishedIndex(settings.PUBLISHED_INDEX_MAX_ENTRIES)
+    return _index
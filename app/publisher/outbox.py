@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+from prometheus_client import Counter, Gauge
+
+from ..config import settings
+from ..schemas import StandardTask
+from ..storage.writer import get_writer
+from ..utils.dedupe import get_async_redis
+from .index import get_published_index
+
+logger = logging.getLogger(__name__)
+
+METRIC_OUTBOX_SIZE = Gauge("ingest_outbox_size", "Tasks waiting in the publish outbox")
+METRIC_OUTBOX_DEFERRED = Counter("ingest_outbox_deferred", "Tasks written to the outbox after a retryable publish failure")
+METRIC_OUTBOX_DRAINED = Counter("ingest_outbox_drained", "Outbox entries handled by the drainer", ["result"])
+
+_TASKS_KEY = "outbox:tasks"
+_DUE_KEY = "outbox:due"
+_DEAD_KEY = "outbox:dead"
+
+# Take due entries and push their due time out by a visibility timeout in one step, so
+# replicas draining together never publish the same entry; a crashed drainer's entries
+# come due again once the timeout passes
+_CLAIM = """
+local ids = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, id in ipairs(ids) do
+    redis.call('zadd', KEYS[1], ARGV[3], id)
+end
+return ids
+"""
+
+
+class PublishOutbox:
+    """Durable retry queue in Redis for tasks the Task API could not take.
+
+    Entries live in a hash keyed by external_source_id (so repeated failures of the
+    same task collapse into one entry) and a sorted set of due times. The drainer
+    waits while the circuit breaker is open, claims due entries in batches, re-checks
+    that the task does not exist yet and publishes it through the shared client, whose
+    adaptive limiter paces the catch-up. Failures are rescheduled with jittered
+    exponential backoff; after OUTBOX_MAX_ATTEMPTS, or on a non-retryable error, the
+    entry moves to ``outbox:dead`` for inspection.
+    """
+
+    def __init__(self) -> None:
+        self._claim = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def backoff(attempts: int) -> float:
+        delay = min(settings.OUTBOX_BACKOFF_MAX_SECONDS, settings.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** min(attempts, 30))
+        # Jitter spreads retries of tasks that failed together over half the delay
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _store(self, external_source_id: str, task_data: Dict[str, Any], attempts: int, error: str, due: float) -> None:
+        entry = orjson.dumps({"task": task_data, "attempts": attempts, "error": error})
+        pipe = get_async_redis().pipeline(transaction=True)
+        pipe.hset(_TASKS_KEY, external_source_id, entry)
+        pipe.zadd(_DUE_KEY, {external_source_id: due})
+        await pipe.execute()
+
+    async def defer(self, task: StandardTask, error: Optional[str]) -> bool:
+        """Record a task for a later retry; False if Redis could not take it."""
+        try:
+            await self._store(
+                task.external_source_id, task.model_dump(mode="json"), 0, error or "unknown", time.time() + self.backoff(0)
+            )
+        except Exception as exc:
+            logger.error("Outbox write failed for %s: %s", task.external_source_id, exc)
+            return False
+        METRIC_OUTBOX_DEFERRED.inc()
+        return True
+
+    async def size(self) -> int:
+        return await get_async_redis().zcard(_DUE_KEY)
+
+    async def _remove(self, external_source_id: str) -> None:
+        pipe = get_async_redis().pipeline(transaction=True)
+        pipe.zrem(_DUE_KEY, external_source_id)
+        pipe.hdel(_TASKS_KEY, external_source_id)
+        await pipe.execute()
+
+    async def _bury(self, external_source_id: str, entry: bytes | str) -> None:
+        pipe = get_async_redis().pipeline(transaction=True)
+        pipe.hset(_DEAD_KEY, external_source_id, entry)
+        pipe.zrem(_DUE_KEY, external_source_id)
+        pipe.hdel(_TASKS_KEY, external_source_id)
+        await pipe.execute()
+
+    async def _drain_one(self, task_api, external_source_id: str, raw: Optional[str]) -> str:
+        if raw is None:
+            # Hash entry already gone (handled by another drainer); drop the stale due time
+            await get_async_redis().zrem(_DUE_KEY, external_source_id)
+            return "missing"
+        entry = orjson.loads(raw)
+        task = StandardTask.model_validate(entry["task"])
+        writer = get_writer()
+        index = get_published_index()
+
+        # The failed attempt may have reached the API after all; never publish twice
+        existing_id = index.get(external_source_id) if index is not None else None
+        if not existing_id:
+            existing_id = await task_api.find_existing_by_external_id(external_source_id)
+        if existing_id:
+            result_label, task_id = "existing", existing_id
+        else:
+            result = await task_api.publish(task)
+            if not result.success:
+                attempts = entry["attempts"] + (0 if result.error == "circuit_open" else 1)
+                if not result.retryable or attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    entry["attempts"], entry["error"] = attempts, result.error
+                    await self._bury(external_source_id, orjson.dumps(entry))
+                    logger.error("Outbox gave up on %s after %d attempts: %s", external_source_id, attempts, result.error)
+                    if writer is not None:
+                        writer.set_status(external_source_id, "failed")
+                    return "dead"
+                delay = max(task_api.breaker.retry_in(), self.backoff(attempts))
+                await self._store(external_source_id, entry["task"], attempts, result.error or "unknown", time.time() + delay)
+                return "retry"
+            result_label, task_id = "published", result.task_id
+            logger.info("Published deferred task id=%s title=%s", task_id, task.title)
+        await self._remove(external_source_id)
+        if index is not None:
+            await index.add(external_source_id, task_id)
+        if writer is not None:
+            writer.set_status(external_source_id, "published", task_id)
+        return result_label
+
+    async def drain_once(self, task_api) -> int:
+        """Handle one batch of due entries; returns how many were claimed."""
+        if task_api.breaker.retry_in() > 0:
+            return 0
+        redis = get_async_redis()
+        if self._claim is None:
+            self._claim = redis.register_script(_CLAIM)
+        now = time.time()
+        ids: List[str] = await self._claim(
+            keys=[_DUE_KEY], args=[now, settings.OUTBOX_BATCH_SIZE, now + settings.OUTBOX_CLAIM_SECONDS]
+        )
+        if not ids:
+            return 0
+        raws = await redis.hmget(_TASKS_KEY, ids)
+
+        async def one(external_source_id: str, raw: Optional[str]) -> None:
+            try:
+                result = await self._drain_one(task_api, external_source_id, raw)
+            except Exception as exc:
+                # Stays claimed until the visibility timeout, then comes due again
+                logger.warning("Outbox entry %s failed: %s", external_source_id, exc)
+                result = "error"
+            METRIC_OUTBOX_DRAINED.labels(result=result).inc()
+
+        await asyncio.gather(*(one(i, r) for i, r in zip(ids, raws)))
+        return len(ids)
+
+    async def run(self, task_api) -> None:
+        while True:
+            claimed = 0
+            try:
+                claimed = await self.drain_once(task_api)
+                METRIC_OUTBOX_SIZE.set(await self.size())
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Outbox drain failed: %s", exc)
+            # A full batch means a backlog: keep going, the limiter sets the pace
+            if claimed < settings.OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(max(settings.OUTBOX_POLL_SECONDS, min(task_api.breaker.retry_in(), 60)))
+
+    def start(self, task_api) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(task_api))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_outbox: PublishOutbox | None = None
+
+
+def get_outbox() -> PublishOutbox | None:
+    global _outbox
+    if not settings.OUTBOX_ENABLED:
+        return None
+    if _outbox is None:
+        _outbox = PublishOutbox()
+    return _outbox
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from prometheus_client import Counter, Gauge
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+METRIC_LIMIT = Gauge("ingest_publish_concurrency_limit", "Current adaptive limit on concurrent Task API requests")
+METRIC_INFLIGHT = Gauge("ingest_publish_inflight", "Task API requests in flight")
+METRIC_CIRCUIT_STATE = Gauge("ingest_publish_circuit_state", "Task API circuit breaker state (0 closed, 1 half-open, 2 open)")
+METRIC_CIRCUIT_REJECTED = Counter("ingest_publish_circuit_rejected", "Task API requests short-circuited while the breaker was open")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class AdaptiveLimiter:
+    """AIMD cap on concurrent requests, driven by latency and errors.
+
+    Each success under the latency target adds 1/limit, so the limit grows by about
+    one per round of requests. An error or a slow response multiplies it by
+    ``backoff``, at most once per ``target`` seconds so one burst of timeouts from
+    requests already in flight counts as a single congestion signal.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        target_seconds: float,
+        backoff: float = 0.5,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.target_seconds = target_seconds
+        self.backoff = min(max(backoff, 0.1), 0.95)
+        self.inflight = 0
+        self._cond = asyncio.Condition()
+        self._decreased_at = 0.0
+        METRIC_LIMIT.set(self.limit)
+
+    async def _acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.inflight < int(self.limit))
+            self.inflight += 1
+            METRIC_INFLIGHT.set(self.inflight)
+
+    async def _release(self) -> None:
+        async with self._cond:
+            self.inflight -= 1
+            METRIC_INFLIGHT.set(self.inflight)
+            self._cond.notify_all()
+
+    def record(self, latency: float, ok: bool) -> None:
+        if ok and latency <= self.target_seconds:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        else:
+            now = time.monotonic()
+            if now - self._decreased_at < self.target_seconds:
+                return
+            self._decreased_at = now
+            self.limit = max(self.minimum, self.limit * self.backoff)
+        METRIC_LIMIT.set(self.limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self._acquire()
+        try:
+            yield
+        finally:
+            await self._release()
+
+
+class CircuitBreaker:
+    """Stops calling the Task API after repeated failures, then probes it.
+
+    ``failure_threshold`` consecutive failures open the circuit for ``reset_seconds``;
+    after that a single probe goes through (half-open). A successful probe closes the
+    circuit; a failed one reopens it with the wait doubled, up to ``max_reset_seconds``.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, max_reset_seconds: float) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.max_reset_seconds = max(reset_seconds, max_reset_seconds)
+        self.state = CLOSED
+        self._failures = 0
+        self._wait = reset_seconds
+        self._opened_at = 0.0
+        self._probing = False
+        METRIC_CIRCUIT_STATE.set(0)
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Task API circuit %s -> %s", self.state, state)
+            self.state = state
+            METRIC_CIRCUIT_STATE.set(_STATE_VALUES[state])
+
+    def retry_in(self) -> float:
+        """Seconds until a request would be let through; 0 if it would be now."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self._wait - time.monotonic())
+
+    def before_call(self) -> None:
+        if self.state == OPEN:
+            if self.retry_in() > 0:
+                METRIC_CIRCUIT_REJECTED.inc()
+                raise CircuitOpenError("circuit_open")
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probing:
+                METRIC_CIRCUIT_REJECTED.inc()
+                raise CircuitOpenError("circuit_open")
+            self._probing = True
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self._failures = 0
+            self._probing = False
+            self._wait = self.reset_seconds
+            self._set_state(CLOSED)
+            return
+        self._failures += 1
+        if self.state == HALF_OPEN:
+            self._probing = False
+            self._wait = min(self.max_reset_seconds, self._wait * 2)
+            self._open()
+        elif self.state == CLOSED and self._failures >= self.failure_threshold:
+            self._open()
+
+    def release(self) -> None:
+        """A call ended without an outcome; let the next one probe if this one was."""
+        self._probing = False
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._set_state(OPEN)
+
+
+def make_limiter() -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        initial=settings.PUBLISH_LIMIT_INITIAL,
+        minimum=settings.PUBLISH_LIMIT_MIN,
+        maximum=settings.PUBLISH_LIMIT_MAX,
+        target_seconds=settings.PUBLISH_LATENCY_TARGET_MS / 1000,
+        backoff=settings.PUBLISH_LIMIT_BACKOFF,
+    )
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds=settings.CIRCUIT_RESET_SECONDS,
+        max_reset_seconds=settings.CIRCUIT_MAX_RESET_SECONDS,
+    )
@@ -2,26 +2,84 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import yaml
+import os
+import random
+import time
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Tuple
+import httpx
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from prometheus_client import Counter, Gauge, Histogram
 
 from .config import settings
+from .collectors.polling import AdaptivePoller, hints_from_headers
+from .collectors.html_collector import HTMLCollector
 from .collectors.rss_collector import RSSCollector
-from .pipeline.runner import run_collector, process_items
+from .pipeline.queue import enqueue_items
+from .pipeline.runner import process_items, stream_collector
 from .ai.generator import TaskGenerator
 from .publisher.client import TaskApiClient
+from .schemas import FeedItem, RunCounts
+from .utils.leases import SourceLeases
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 logger = logging.getLogger(__name__)
 
+METRIC_CYCLE_SECONDS = Histogram(
+    "ingest_collector_cycle_seconds",
+    "End-to-end duration of one collect + process cycle",
+    ["collector"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+METRIC_JOBS_SKIPPED = Counter(
+    "ingest_scheduler_jobs_skipped", "Scheduled runs dropped because the previous run was still going or was late", ["collector", "reason"]
+)
+METRIC_POLL_DELAY = Gauge("ingest_poll_delay_seconds", "Delay until the next scheduled poll of a source", ["collector"])
+
+# Items per XADD pipeline when streaming a collector into the queue
+_ENQUEUE_BATCH = 500
+
+
+async def _chain(head: List[FeedItem], rest: AsyncIterator[FeedItem]) -> AsyncIterator[FeedItem]:
+    for item in head:
+        yield item
+    async for item in rest:
+        yield item
+
 
 class IngestScheduler:
     def __init__(self) -> None:
-        self.scheduler = AsyncIOScheduler(timezone=settings.TIMEZONE)
+        # APScheduler is only needed once jobs are scheduled; /run-now alone never loads it
+        self._scheduler: AsyncIOScheduler | None = None
         self.generator = TaskGenerator()
         self.task_api = TaskApiClient()
+        self.collectors: Dict[str, object] = {}
+        self._sources_mtime: int | None = None
+        # One running cycle per source, shared by scheduled and manual triggers
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.poller = AdaptivePoller()
+        self.leases: SourceLeases | None = None
+
+    @property
+    def scheduler(self) -> AsyncIOScheduler:
+        if self._scheduler is None:
+            from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+            from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+            self._scheduler = AsyncIOScheduler(timezone=settings.TIMEZONE)
+            self._scheduler.add_listener(self._on_job_skipped, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+        return self._scheduler
+
+    @property
+    def running(self) -> bool:
+        return self._scheduler is not None and self._scheduler.running
 
     def load_collectors(self):
+        import yaml
+
         with open(settings.DATA_SOURCES_FILE, "r", encoding="utf-8") as f:
             cfg = yaml.safe_load(f) or {}
         sources = cfg.get("sources", [])
@@ -34,18 +92,58 @@ class IngestScheduler:
                         name=s.get("name", s.get("id")),
                         url=s.get("url"),
                         interval_seconds=int(s.get("interval_seconds", settings.SCHEDULE_INTERVAL_SECONDS)),
+                        streaming=s.get("streaming"),
                     )
                 )
+            elif s.get("type") == "html":
+                try:
+                    collector = HTMLCollector(
+                        source_id=s.get("id"),
+                        name=s.get("name", s.get("id")),
+                        url=s.get("url"),
+                        selectors=s.get("selectors") or {},
+                        interval_seconds=int(s.get("interval_seconds", settings.SCHEDULE_INTERVAL_SECONDS)),
+                    )
+                except ValueError as exc:
+                    # A bad selector disables that source, not the whole config
+                    logger.error("Skipping source %s: %s", s.get("id"), exc)
+                    continue
+                collectors.append(collector)
         return collectors
 
+    def get_collectors(self, reload: bool = False) -> List:
+        # Re-read the sources file when it changes so /run-now sees edits without a restart
+        try:
+            mtime = os.stat(settings.DATA_SOURCES_FILE).st_mtime_ns
+        except OSError:
+            mtime = None
+        if reload or not self.collectors or mtime != self._sources_mtime:
+            self.collectors = {c.id: c for c in self.load_collectors()}
+            self._sources_mtime = mtime
+        return list(self.collectors.values())
+
     def start(self) -> None:
-        collectors = self.load_collectors()
-        for c in collectors:
+        collectors = self.get_collectors(reload=True)
+        if settings.SOURCE_LEASES_ENABLED:
+            # Every replica schedules every source; only the current lease holder actually polls it
+            self.leases = SourceLeases([c.id for c in collectors])
+            self.leases.start()
+            logger.info("Source leases enabled as worker %s", self.leases.worker_id)
+        now = datetime.now(timezone.utc)
+        for i, c in enumerate(collectors):
+            # Spread first runs across one interval so sources do not all fire together
+            first_run = now + timedelta(seconds=c.interval_seconds * (i + random.random()) / len(collectors))
+            if settings.POLL_ADAPTIVE:
+                logger.info("Scheduling collector %s adaptively, first run at %s", c.id, first_run.isoformat())
+                self._schedule_next(c, first_run)
+                continue
             logger.info("Scheduling collector %s every %ss", c.id, c.interval_seconds)
             self.scheduler.add_job(
                 self._run_once_for_collector,
                 "interval",
                 seconds=c.interval_seconds,
+                jitter=int(c.interval_seconds * settings.POLL_JITTER_RATIO) or None,
+                next_run_time=first_run,
                 args=[c],
                 id=f"collector:{c.id}",
                 replace_existing=True,
@@ -54,17 +152,112 @@ class IngestScheduler:
             )
         self.scheduler.start()
 
+    def _schedule_next(self, collector, run_date: datetime) -> None:
+        METRIC_POLL_DELAY.labels(collector=collector.id).set(max(0.0, (run_date - datetime.now(timezone.utc)).total_seconds()))
+        self.scheduler.add_job(
+            self._run_once_for_collector,
+            "date",
+            run_date=run_date,
+            args=[collector],
+            id=f"collector:{collector.id}",
+            replace_existing=True,
+            misfire_grace_time=max(60, collector.interval_seconds // 2),
+        )
+
+    async def shutdown(self) -> None:
+        if self.running:
+            self.scheduler.shutdown(wait=False)
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self.leases is not None:
+            await self.leases.close()
+        await self.task_api.aclose()
+
+    async def run_source(self, collector) -> Tuple[RunCounts, bool]:
+        """Run one collect + process cycle; returns (counts, coalesced).
+
+        A trigger arriving while the same source is already running waits for that
+        cycle instead of starting a second one, and gets its counts.
+        """
+        task = self._inflight.get(collector.id)
+        if task is not None:
+            return await asyncio.shield(task), True
+        task = asyncio.create_task(self._cycle(collector))
+        self._inflight[collector.id] = task
+        task.add_done_callback(lambda _t, key=collector.id: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+    async def _cycle(self, collector) -> RunCounts:
+        start = time.perf_counter()
+        try:
+            try:
+                # aclosing: a failed run releases the feed connection right away
+                async with aclosing(stream_collector(collector)) as items:
+                    if settings.QUEUE_ENABLED:
+                        counts = await self._enqueue(collector, items)
+                    else:
+                        # Items flow into the pipeline as the collector parses them
+                        counts = await process_items(items, self.task_api, self.generator, collector_id=collector.id)
+                # Only now may the collector remember what it saw; a failed run is collected again
+                await collector.commit()
+            except httpx.HTTPStatusError as exc:
+                # 429/503 usually carry Retry-After; honour it on the next poll
+                self.poller.observe(collector.id, 0, hints_from_headers(exc.response.headers))
+                raise
+            self.poller.observe(collector.id, counts.collected, getattr(collector, "poll_hints", None))
+            return counts
+        finally:
+            METRIC_CYCLE_SECONDS.labels(collector=collector.id).observe(time.perf_counter() - start)
+
+    async def _enqueue(self, collector, items: AsyncIterator[FeedItem]) -> RunCounts:
+        counts = RunCounts()
+        batch: List[FeedItem] = []
+        while True:
+            item = await anext(items, None)
+            if item is not None:
+                batch.append(item)
+                if len(batch) < _ENQUEUE_BATCH:
+                    continue
+            if batch:
+                try:
+                    counts.queued += await enqueue_items(batch)
+                except Exception as exc:
+                    logger.warning("Enqueue for %s failed, processing inline: %s", collector.id, exc)
+                    inline = await process_items(_chain(batch, items), self.task_api, self.generator, collector_id=collector.id)
+                    inline.collected += counts.collected
+                    inline.queued = counts.queued
+                    return inline
+                counts.collected += len(batch)
+                batch = []
+            if item is None:
+                return counts
+
+    def _on_job_skipped(self, event) -> None:
+        from apscheduler.events import EVENT_JOB_MAX_INSTANCES
+
+        collector_id = event.job_id.split(":", 1)[-1]
+        reason = "overlap" if event.code == EVENT_JOB_MAX_INSTANCES else "missed"
+        METRIC_JOBS_SKIPPED.labels(collector=collector_id, reason=reason).inc()
+        logger.warning("Skipped run of collector %s (%s)", collector_id, reason)
+        # An adaptive poll is a one-shot job that books the next one when it finishes; a
+        # dropped run never gets there, so book it here or the source stops being polled
+        collector = self.collectors.get(collector_id)
+        if settings.POLL_ADAPTIVE and collector is not None and self.running:
+            # Spread the catch-up: after a stall every source misses at once
+            delay = random.uniform(0, min(60, collector.interval_seconds))
+            self._schedule_next(collector, datetime.now(timezone.utc) + timedelta(seconds=delay))
+
     async def _run_once_for_collector(self, collector) -> None:
         try:
-            items = run_collector(collector)
-            await process_items(items, self.task_api, self.generator)
+            if self.leases is not None and not self.leases.owns(collector.id):
+                METRIC_JOBS_SKIPPED.labels(collector=collector.id, reason="not_owner").inc()
+                return
+            counts, coalesced = await self.run_source(collector)
+            if coalesced:
+                METRIC_JOBS_SKIPPED.labels(collector=collector.id, reason="coalesced").inc()
+            logger.info("Collector %s finished: %s", collector.id, counts.model_dump())
         except Exception as exc:
             logger.exception("Collector %s failed: %s", collector.id, exc)
-
-
-async def run_once_now() -> None:
-    sched = IngestScheduler()
-    collectors = sched.load_collectors()
-    for c in collectors:
-        items = run_collector(c)
-        await process_items(items, sched.task_api, sched.generator)
\ No newline at end of file
+        finally:
+            if settings.POLL_ADAPTIVE and self.running:
+                self._schedule_next(collector, self.poller.next_run_time(collector.id, collector.interval_seconds))
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field, HttpUrl
 
+from .utils.hashing import compute_item_hash
+from .utils.urls import url_key
+
 
 class CollectedItem(BaseModel):
     source_id: str
@@ -14,6 +18,63 @@ class CollectedItem(BaseModel):
     raw: Optional[Dict[str, Any]] = None
 
 
+@dataclass(slots=True)
+class FeedItem:
+    """Compact in-pipeline form of a collected entry.
+
+    Built straight from parser output without validation; the identity hash and the
+    URL string are computed once here. The URL is validated when the StandardTask sent
+    to the Task API is built (or via to_model()).
+    """
+
+    source_id: str
+    url: str
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    published_at: Optional[datetime] = None
+    external_source_id: str = ""
+
+    def __post_init__(self) -> None:
+        if not self.external_source_id:
+            self.external_source_id = compute_item_hash(self.source_id, url_key(self.url))
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        return {"external_source_id": self.external_source_id}
+
+    def to_model(self) -> CollectedItem:
+        return CollectedItem(
+            source_id=self.source_id,
+            url=self.url,
+            title=self.title,
+            summary=self.summary,
+            published_at=self.published_at,
+            raw=self.raw,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source_id": self.source_id,
+            "url": self.url,
+            "title": self.title,
+            "summary": self.summary,
+            "published_at": self.published_at.isoformat() if self.published_at else None,
+            "external_source_id": self.external_source_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeedItem":
+        published_at = data.get("published_at")
+        return cls(
+            source_id=data["source_id"],
+            url=data["url"],
+            title=data.get("title"),
+            summary=data.get("summary"),
+            published_at=datetime.fromisoformat(published_at) if published_at else None,
+            external_source_id=data.get("external_source_id") or "",
+        )
+
+
 class StandardTask(BaseModel):
     external_source_id: str = Field(description="Deterministic id from source, e.g., hash(url)")
     title: str
@@ -29,4 +90,16 @@ class StandardTask(BaseModel):
 class PublishResult(BaseModel):
     success: bool
     task_id: Optional[str] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+    # Transport errors, 5xx, 429 and an open circuit: the task is fine, the API is not
+    retryable: bool = False
+
+
+class RunCounts(BaseModel):
+    collected: int = 0
+    queued: int = 0
+    filtered: int = 0
+    existing: int = 0
+    published: int = 0
+    failed: int = 0
+    deferred: int = 0
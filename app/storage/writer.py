@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..config import settings
+from ..db import get_async_engine
+from ..models import GeneratedTask, SourceItem
+from ..schemas import FeedItem, StandardTask
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement; keeps bind parameters well under the Postgres limit
+_CHUNK_ROWS = 1000
+
+
+class WriteBehindWriter:
+    """Buffers SourceItem/GeneratedTask rows and writes them in bulk.
+
+    A flush runs when any buffer reaches ``batch_size`` or every
+    ``flush_seconds``. Rows stay buffered across failed flushes, up to
+    ``max_buffered`` per buffer.
+    """
+
+    def __init__(self, batch_size: int, flush_seconds: float, max_buffered: int) -> None:
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_buffered = max(self.batch_size, max_buffered)
+        self._source_items: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._tasks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # external_source_id -> (status, published_task_id) for rows already written
+        self._status: "OrderedDict[str, Tuple[str, Optional[str]]]" = OrderedDict()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._failing = False
+
+    def _trim(self, buffer: OrderedDict, name: str) -> None:
+        while len(buffer) > self.max_buffered:
+            buffer.popitem(last=False)
+            if not self._failing:
+                logger.warning("Persistence buffer %s full, dropping oldest rows", name)
+
+    def _touch(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+        if max(len(self._source_items), len(self._tasks), len(self._status)) >= self.batch_size:
+            self._wakeup.set()
+
+    def add_source_item(self, item: FeedItem) -> None:
+        content_hash = item.external_source_id
+        self._source_items[(item.source_id, content_hash)] = {
+            "source_id": item.source_id,
+            "source_url": str(item.url),
+            "title": item.title,
+            "content_hash": content_hash,
+            "raw_content": item.summary,
+        }
+        self._trim(self._source_items, "source_items")
+        self._touch()
+
+    def add_task(self, task: StandardTask) -> None:
+        self._tasks[task.external_source_id] = {
+            "external_source_id": task.external_source_id,
+            "title": task.title,
+            "description": task.description,
+            "priority": task.priority,
+            "status": "pending",
+            "published_task_id": None,
+            "meta": task.meta,
+        }
+        self._trim(self._tasks, "generated_tasks")
+        self._touch()
+
+    def set_status(self, external_source_id: str, status: str, published_task_id: Optional[str] = None) -> None:
+        row = self._tasks.get(external_source_id)
+        if row is not None:
+            # Still buffered: the insert carries the final status
+            row["status"] = status
+            row["published_task_id"] = published_task_id
+        else:
+            self._status[external_source_id] = (status, published_task_id)
+            self._trim(self._status, "task_status")
+        self._touch()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not (self._source_items or self._tasks or self._status):
+                return
+            source_items = list(self._source_items.values())
+            tasks = list(self._tasks.values())
+            statuses = list(self._status.items())
+            self._source_items.clear()
+            self._tasks.clear()
+            self._status.clear()
+            try:
+                await self._write(source_items, tasks, statuses)
+            except Exception as exc:
+                if not self._failing:
+                    logger.warning("Persistence flush failed, keeping rows buffered: %s", exc)
+                self._failing = True
+                self._requeue(source_items, tasks, statuses)
+                return
+            if self._failing:
+                logger.info("Persistence flush recovered")
+            self._failing = False
+
+    def _requeue(
+        self,
+        source_items: List[Dict[str, Any]],
+        tasks: List[Dict[str, Any]],
+        statuses: List[Tuple[str, Tuple[str, Optional[str]]]],
+    ) -> None:
+        # Put failed rows back in front of anything buffered since the flush started
+        merged_items: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict(
+            ((row["source_id"], row["content_hash"]), row) for row in source_items
+        )
+        merged_items.update(self._source_items)
+        self._source_items = merged_items
+        merged_tasks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict((row["external_source_id"], row) for row in tasks)
+        merged_tasks.update(self._tasks)
+        self._tasks = merged_tasks
+        merged_status: "OrderedDict[str, Tuple[str, Optional[str]]]" = OrderedDict(statuses)
+        merged_status.update(self._status)
+        self._status = merged_status
+        for buffer, name in ((self._source_items, "source_items"), (self._tasks, "generated_tasks"), (self._status, "task_status")):
+            self._trim(buffer, name)
+
+    async def _write(
+        self,
+        source_items: List[Dict[str, Any]],
+        tasks: List[Dict[str, Any]],
+        statuses: List[Tuple[str, Tuple[str, Optional[str]]]],
+    ) -> None:
+        async with get_async_engine().begin() as conn:
+            for i in range(0, len(source_items), _CHUNK_ROWS):
+                stmt = pg_insert(SourceItem).values(source_items[i : i + _CHUNK_ROWS])
+                await conn.execute(stmt.on_conflict_do_nothing(constraint="uq_sourceitem_source_hash"))
+            table = GeneratedTask.__table__
+            for i in range(0, len(tasks), _CHUNK_ROWS):
+                stmt = pg_insert(GeneratedTask).values(tasks[i : i + _CHUNK_ROWS])
+                stmt = stmt.on_conflict_do_update(
+                    constraint="uq_generatedtask_external_source_id",
+                    set_={
+                        "title": stmt.excluded.title,
+                        "description": stmt.excluded.description,
+                        "priority": stmt.excluded.priority,
+                        # A regenerated row must not reset an earlier publish outcome
+                        "status": case((stmt.excluded.status == "pending", table.c.status), else_=stmt.excluded.status),
+                        "published_task_id": func.coalesce(stmt.excluded.published_task_id, table.c.published_task_id),
+                        "meta": stmt.excluded.meta,
+                    },
+                )
+                await conn.execute(stmt)
+            if statuses:
+                stmt = (
+                    update(table)
+                    .where(table.c.external_source_id == bindparam("b_external_source_id"))
+                    .values(status=bindparam("b_status"), published_task_id=bindparam("b_published_task_id"))
+                )
+                await conn.execute(
+                    stmt,
+                    [
+                        {"b_external_source_id": ext_id, "b_status": status, "b_published_task_id": task_id}
+                        for ext_id, (status, task_id) in statuses
+                    ],
+                )
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._flusher = None
+        await self.flush()
+
+
+_writer: WriteBehindWriter | None = None
+
+
+def get_writer() -> WriteBehindWriter | None:
+    global _writer
+    if not settings.PERSIST_ENABLED:
+        return None
+    if _writer is None:
+        _writer = WriteBehindWriter(
+            batch_size=settings.PERSIST_BATCH_SIZE,
+            flush_seconds=settings.PERSIST_FLUSH_SECONDS,
+            max_buffered=settings.PERSIST_MAX_BUFFERED,
+        )
+    return _writer
+
+
+async def close_writer() -> None:
+    global _writer
+    if _writer is not None:
+        await _writer.close()
+        _writer = None
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Generic, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Groups concurrent submit() calls into one flush over a size or time window.
+
+    ``flush`` receives the batch and must return one result per item, in order. With
+    ``eager`` an item submitted while no flush is running goes out at once; batches then
+    form from what arrives during a flush, so light load pays no window latency.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[T]], Awaitable[List[R]]],
+        max_size: int,
+        max_wait_seconds: float,
+        eager: bool = False,
+    ) -> None:
+        self._flush = flush
+        self.max_size = max(1, max_size)
+        self.max_wait_seconds = max(0.0, max_wait_seconds)
+        self.eager = eager
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_size or (self.eager and not self._running):
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._flush_pending)
+        return await fut
+
+    def _flush_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._flushed)
+
+    def _flushed(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if self.eager and not self._running and self._pending:
+            self._flush_pending()
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            results = await self._flush([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"batch flush returned {len(results)} results for {len(batch)} items")
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    async def aclose(self) -> None:
+        self._flush_pending()
+        if self._running:
+            await asyncio.gather(*list(self._running), return_exceptions=True)
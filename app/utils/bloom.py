@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytearray] = None) -> None:
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        # Kirsch-Mitzenmacher double hashing over one 128-bit digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RotatingBloomFilter:
+    """Bloom filters bucketed by time so keys age out roughly after ``ttl_seconds``.
+
+    Keys are added to the bucket of the current period and looked up in all live
+    buckets; whole buckets are dropped once they fall outside the TTL window.
+    """
+
+    def __init__(self, ttl_seconds: int, bucket_seconds: int, expected_keys_per_day: int, error_rate: float) -> None:
+        self.bucket_seconds = max(60, bucket_seconds)
+        self.bucket_count = max(1, int(math.ceil(ttl_seconds / self.bucket_seconds)))
+        self.capacity = max(1, int(expected_keys_per_day * self.bucket_seconds / 86400))
+        # Lookups probe every bucket, so split the error budget between them
+        self.error_rate = error_rate / (self.bucket_count + 1)
+        self.buckets: Dict[int, BloomFilter] = {}
+
+    def _current(self, now: Optional[float] = None) -> int:
+        return int((now if now is not None else time.time()) // self.bucket_seconds)
+
+    def _rotate(self, current: int) -> None:
+        # Keep one extra bucket so retention never undercuts the Redis TTL
+        oldest = current - self.bucket_count
+        for index in [i for i in self.buckets if i < oldest]:
+            del self.buckets[index]
+
+    def add(self, key: str, now: Optional[float] = None) -> None:
+        current = self._current(now)
+        self._rotate(current)
+        bucket = self.buckets.get(current)
+        if bucket is None:
+            bucket = self.buckets[current] = BloomFilter(self.capacity, self.error_rate)
+        bucket.add(key)
+
+    def contains(self, key: str, now: Optional[float] = None) -> bool:
+        self._rotate(self._current(now))
+        return any(key in bucket for bucket in self.buckets.values())
+
+    def dump(self) -> bytes:
+        header = {
+            "bucket_seconds": self.bucket_seconds,
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "buckets": [[index, len(b.bits)] for index, b in sorted(self.buckets.items())],
+        }
+        body = b"".join(bytes(b.bits) for _, b in sorted(self.buckets.items()))
+        return json.dumps(header).encode("utf-8") + b"\n" + body
+
+    def restore(self, data: bytes) -> bool:
+        raw_header, _, body = data.partition(b"\n")
+        header = json.loads(raw_header)
+        # Sizing changed since the snapshot was taken: start over rather than misread bits
+        if (
+            header.get("bucket_seconds") != self.bucket_seconds
+            or header.get("capacity") != self.capacity
+            or header.get("error_rate") != self.error_rate
+        ):
+            return False
+        offset = 0
+        buckets: Dict[int, BloomFilter] = {}
+        for index, length in header.get("buckets", []):
+            bits = bytearray(body[offset : offset + length])
+            offset += length
+            buckets[int(index)] = BloomFilter(self.capacity, self.error_rate, bits=bits)
+        self.buckets = buckets
+        self._rotate(self._current())
+        return True
+
+
+def write_snapshot(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """ISO 8601 / RFC 3339 (Atom, <time datetime>) or RFC 822 (RSS pubDate) as naive UTC.
+
+    Naive UTC matches what the feedparser path produces, so items from every parser
+    compare and sort alike against one watermark.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00").replace("z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -1,27 +1,55 @@
 from __future__ import annotations
 
-import hashlib
-import json
+import asyncio
+import logging
+import time
 from datetime import timedelta
-from typing import Any
+from typing import TYPE_CHECKING, List, Sequence
 
-import redis
 from ..config import settings
+from .bloom import RotatingBloomFilter, read_snapshot, write_snapshot
+from .hashing import compute_item_hash  # noqa: F401  (kept importable from here)
 
+if TYPE_CHECKING:
+    import redis
+    import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
 
 _redis_client: redis.Redis | None = None
+_async_redis_client: aioredis.Redis | None = None
+_bloom: RotatingBloomFilter | None = None
+_bloom_saved_at: float = 0.0
+_redis_down_until: float = 0.0
+# Keys claimed locally while Redis was down, replayed once it is back
+_unsynced_keys: List[str] = []
+_UNSYNCED_LIMIT = 100_000
 
 
 def get_redis() -> redis.Redis:
     global _redis_client
     if _redis_client is None:
+        import redis
+
         _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
     return _redis_client
 
 
-def compute_item_hash(*parts: Any) -> str:
-    normalized = ":".join([json.dumps(p, sort_keys=True, ensure_ascii=False) if not isinstance(p, str) else p for p in parts])
-    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+def get_async_redis() -> aioredis.Redis:
+    global _async_redis_client
+    if _async_redis_client is None:
+        import redis.asyncio as aioredis
+
+        _async_redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _async_redis_client
+
+
+async def close_async_redis() -> None:
+    global _async_redis_client
+    await save_bloom_snapshot()
+    if _async_redis_client is not None:
+        await _async_redis_client.aclose()
+        _async_redis_client = None
 
 
 def is_duplicate(dedup_key: str, ttl_days: int | None = None) -> bool:
@@ -33,4 +61,103 @@ def is_duplicate(dedup_key: str, ttl_days: int | None = None) -> bool:
         return added is None
     except Exception:
         # If Redis is unavailable, do not treat as duplicate to avoid data loss
-        return False
\ No newline at end of file
+        return False
+
+
+def get_bloom() -> RotatingBloomFilter | None:
+    global _bloom, _bloom_saved_at
+    if not settings.DEDUPE_BLOOM_ENABLED:
+        return None
+    if _bloom is None:
+        _bloom = RotatingBloomFilter(
+            ttl_seconds=settings.DUP_TTL_DAYS * 86400,
+            bucket_seconds=settings.DEDUPE_BLOOM_BUCKET_HOURS * 3600,
+            expected_keys_per_day=settings.DEDUPE_BLOOM_EXPECTED_KEYS_PER_DAY,
+            error_rate=settings.DEDUPE_BLOOM_ERROR_RATE,
+        )
+        try:
+            data = read_snapshot(settings.DEDUPE_BLOOM_SNAPSHOT_PATH)
+            if data and not _bloom.restore(data):
+                logger.info("Dedupe bloom snapshot does not match current sizing, starting empty")
+        except Exception as exc:
+            logger.warning("Dedupe bloom snapshot unreadable: %s", exc)
+        _bloom_saved_at = time.monotonic()
+    return _bloom
+
+
+async def save_bloom_snapshot() -> None:
+    global _bloom_saved_at
+    if _bloom is None or not settings.DEDUPE_BLOOM_SNAPSHOT_PATH:
+        return
+    _bloom_saved_at = time.monotonic()
+    # Serialize on the loop (cheap copy), write to disk in a thread
+    data = _bloom.dump()
+    try:
+        await asyncio.to_thread(write_snapshot, settings.DEDUPE_BLOOM_SNAPSHOT_PATH, data)
+    except Exception as exc:
+        logger.warning("Dedupe bloom snapshot failed: %s", exc)
+
+
+async def _claim_in_redis(dedup_keys: Sequence[str], replay: Sequence[str], ttl: timedelta) -> List[bool]:
+    client = get_async_redis()
+    async with client.pipeline(transaction=False) as pipe:
+        for dedup_key in replay:
+            pipe.set(name=f"dedupe:{dedup_key}", value="1", ex=ttl)
+        # Commands keep batch order so a repeated key sees its first occurrence
+        for dedup_key in dedup_keys:
+            pipe.set(name=f"dedupe:{dedup_key}", value="1", nx=True, ex=ttl)
+        results = await pipe.execute()
+    return [added is None for added in results[len(replay) :]]
+
+
+async def claim_keys(dedup_keys: Sequence[str], ttl_days: int | None = None) -> List[bool]:
+    """Check and claim all keys in one pipelined round trip; True marks a duplicate.
+
+    Redis is the authority whenever it answers. The bloom tier is per process and
+    starts empty after a restart or on another replica, so a miss there proves
+    nothing; it only decides duplicates while Redis is down.
+    """
+    global _redis_down_until, _unsynced_keys
+    if not dedup_keys:
+        return []
+    ttl = timedelta(days=ttl_days or settings.DUP_TTL_DAYS)
+    bloom = get_bloom()
+
+    results: List[bool] = []
+    redis_ok = False
+    if time.monotonic() >= _redis_down_until:
+        replay, _unsynced_keys = _unsynced_keys, []
+        try:
+            results = await _claim_in_redis(dedup_keys, replay, ttl)
+            redis_ok = True
+        except Exception as exc:
+            logger.warning("Redis dedupe unavailable: %s", exc)
+            _redis_down_until = time.monotonic() + settings.DEDUPE_REDIS_RETRY_SECONDS
+            _unsynced_keys = replay + _unsynced_keys
+    if not redis_ok:
+        if bloom is None:
+            # Do not treat as duplicate to avoid data loss
+            results = [False] * len(dedup_keys)
+        else:
+            # Local tier stands in while Redis is down; a repeated key within the
+            # batch must see its first occurrence
+            results = []
+            batch_seen: set[str] = set()
+            for dedup_key in dedup_keys:
+                seen = dedup_key in batch_seen or bloom.contains(dedup_key)
+                results.append(seen)
+                batch_seen.add(dedup_key)
+                if not seen:
+                    _unsynced_keys.append(dedup_key)
+            _unsynced_keys = _unsynced_keys[-_UNSYNCED_LIMIT:]
+
+    if bloom is not None:
+        for dedup_key in dedup_keys:
+            bloom.add(dedup_key)
+        if time.monotonic() - _bloom_saved_at >= settings.DEDUPE_BLOOM_SNAPSHOT_SECONDS:
+            await save_bloom_snapshot()
+    return results
+
+
+async def is_duplicate_async(dedup_key: str, ttl_days: int | None = None) -> bool:
+    return (await claim_keys([dedup_key], ttl_days))[0]
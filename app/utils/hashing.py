@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+
+def compute_item_hash(*parts: Any) -> str:
+    normalized = ":".join([json.dumps(p, sort_keys=True, ensure_ascii=False) if not isinstance(p, str) else p for p in parts])
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
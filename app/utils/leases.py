@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Dict, Iterable, List
+
+from prometheus_client import Gauge
+
+from ..config import settings
+from .dedupe import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+METRIC_OWNED_SOURCES = Gauge("ingest_owned_sources", "Sources whose lease this worker currently holds")
+METRIC_LIVE_WORKERS = Gauge("ingest_live_workers", "Workers with a recent heartbeat in the lease registry")
+
+_WORKERS_KEY = "lease:workers"
+
+# Only touch a lease while we still hold it; otherwise another worker has taken over
+_RENEW = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _lease_key(source_id: str) -> str:
+    return f"lease:source:{source_id}"
+
+
+def rendezvous_owner(source_id: str, workers: Iterable[str]) -> str | None:
+    """Highest-random-weight owner: adding or removing a worker only moves that worker's share."""
+    best, best_score = None, -1
+    for worker in workers:
+        score = int.from_bytes(hashlib.blake2b(f"{worker}|{source_id}".encode(), digest_size=8).digest(), "big")
+        if score > best_score:
+            best, best_score = worker, score
+    return best
+
+
+class SourceLeases:
+    """Redis leases giving each source exactly one live owner among all workers.
+
+    Every heartbeat the worker refreshes its registry entry, prunes workers whose
+    heartbeat is older than the lease TTL, and works out from rendezvous hashing which
+    sources it should own. It acquires those (SET NX PX), renews the ones it holds, and
+    releases any that now hash to another worker so that worker can pick them up.
+    """
+
+    def __init__(self, source_ids: Iterable[str], worker_id: str | None = None) -> None:
+        self.source_ids: List[str] = list(source_ids)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # source_id -> monotonic deadline; ownership lapses locally if Redis stops answering
+        self._owned: Dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+        self._renew = None
+        self._release = None
+
+    def owns(self, source_id: str) -> bool:
+        return self._owned.get(source_id, 0.0) > time.monotonic()
+
+    def _scripts(self, redis):
+        if self._renew is None:
+            self._renew = redis.register_script(_RENEW)
+            self._release = redis.register_script(_RELEASE)
+        return self._renew, self._release
+
+    async def heartbeat(self) -> None:
+        redis = get_async_redis()
+        renew, release = self._scripts(redis)
+        ttl_ms = settings.SOURCE_LEASE_TTL_SECONDS * 1000
+        now = time.time()
+        started = time.monotonic()
+
+        pipe = redis.pipeline(transaction=False)
+        pipe.zadd(_WORKERS_KEY, {self.worker_id: now})
+        pipe.zremrangebyscore(_WORKERS_KEY, "-inf", now - settings.SOURCE_LEASE_TTL_SECONDS)
+        pipe.zrange(_WORKERS_KEY, 0, -1)
+        _, _, workers = await pipe.execute()
+        METRIC_LIVE_WORKERS.set(len(workers))
+
+        wanted = {sid for sid in self.source_ids if rendezvous_owner(sid, workers) == self.worker_id}
+        deadline = started + settings.SOURCE_LEASE_TTL_SECONDS
+        for source_id in self.source_ids:
+            key = _lease_key(source_id)
+            held = source_id in self._owned
+            if source_id in wanted:
+                ok = await renew(keys=[key], args=[self.worker_id, ttl_ms]) if held else None
+                if not ok:
+                    ok = await redis.set(key, self.worker_id, nx=True, px=ttl_ms)
+                if ok:
+                    if not held:
+                        logger.info("Worker %s acquired source %s", self.worker_id, source_id)
+                    self._owned[source_id] = deadline
+                else:
+                    self._owned.pop(source_id, None)
+            elif held:
+                # Rebalanced away: hand it over instead of waiting for the TTL to lapse
+                await release(keys=[key], args=[self.worker_id])
+                self._owned.pop(source_id, None)
+                logger.info("Worker %s released source %s", self.worker_id, source_id)
+        METRIC_OWNED_SOURCES.set(len(self._owned))
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.heartbeat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Lease heartbeat failed: %s", exc)
+            await asyncio.sleep(settings.SOURCE_LEASE_HEARTBEAT_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            redis = get_async_redis()
+            _, release = self._scripts(redis)
+            for source_id in list(self._owned):
+                await release(keys=[_lease_key(source_id)], args=[self.worker_id])
+            await redis.zrem(_WORKERS_KEY, self.worker_id)
+        except Exception as exc:
+            logger.debug("Lease release on shutdown failed: %s", exc)
+        self._owned.clear()
+        METRIC_OWNED_SOURCES.set(0)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from ..config import settings
+from .dedupe import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+_BITS = 64
+_TAGS = re.compile(r"<[^>]+>")
+# Latin words/numbers as tokens; CJK has no spaces, so each ideograph is a token
+_TOKENS = re.compile(r"[0-9a-z]+|[㐀-鿿豈-﫿]", re.I)
+_REDIS_KEY = "neardup:fingerprints"
+_TRIM_EVERY = 500
+# Re-read a little history on each sync so entries written with a slightly older
+# timestamp (clock skew, in-flight pipelines) are not skipped
+_SYNC_OVERLAP_SECONDS = 5.0
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKENS.findall(_TAGS.sub(" ", text or "").lower())
+
+
+def simhash(tokens: List[str]) -> int:
+    """64-bit SimHash over tokens plus token bigrams (bigrams keep some word order)."""
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+    # Column-wise bit counts via zip over fixed-width binary strings keeps the loop in C
+    rows = [format(int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big"), "064b") for f in features]
+    half = len(rows) / 2
+    bits = "".join("1" if column.count("1") > half else "0" for column in zip(*rows))
+    return int(bits, 2)
+
+
+class NearDuplicateIndex:
+    """SimHash fingerprints of recent items, bounded in size and age, mirrored through Redis.
+
+    Lookups use band splitting: with max distance k the 64 bits are cut into k+1
+    bands, and by pigeonhole any fingerprint within k bits matches at least one band
+    exactly, so only those candidates need a Hamming check.
+
+    Each worker keeps a local copy and appends its own fingerprints to a Redis sorted
+    set (scored by time). Before every check it pulls what other workers added since
+    its last sync. The sorted set is trimmed to NEAR_DUP_MAX_ENTRIES and
+    NEAR_DUP_MAX_AGE_HOURS.
+    """
+
+    def __init__(self, max_distance: int, max_entries: int, max_age_seconds: int) -> None:
+        self.max_distance = max(0, min(max_distance, 15))
+        self.max_entries = max(1, max_entries)
+        self.max_age_seconds = max_age_seconds
+        self._bands = self.max_distance + 1
+        self._band_bits = _BITS // self._bands
+        # member ("<fp hex>:<external id>") -> added at; oldest first
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._buckets: List[Dict[int, Set[str]]] = [dict() for _ in range(self._bands)]
+        self._synced_at = 0.0
+        self._pending: Dict[str, float] = {}
+        self._writes = 0
+
+    def _band_values(self, fp: int) -> List[int]:
+        mask = (1 << self._band_bits) - 1
+        return [(fp >> (i * self._band_bits)) & mask for i in range(self._bands)]
+
+    def _insert(self, member: str, added_at: float) -> None:
+        if member in self._entries:
+            return
+        self._entries[member] = added_at
+        fp = int(member.split(":", 1)[0], 16)
+        for band, value in enumerate(self._band_values(fp)):
+            self._buckets[band].setdefault(value, set()).add(member)
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.max_age_seconds
+        while self._entries:
+            member, added_at = next(iter(self._entries.items()))
+            if added_at >= cutoff and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+            fp = int(member.split(":", 1)[0], 16)
+            for band, value in enumerate(self._band_values(fp)):
+                bucket = self._buckets[band].get(value)
+                if bucket is not None:
+                    bucket.discard(member)
+                    if not bucket:
+                        del self._buckets[band][value]
+
+    def find(self, fp: int, external_source_id: str) -> Optional[str]:
+        """External id of a stored near-duplicate of ``fp``, ignoring the item itself."""
+        for band, value in enumerate(self._band_values(fp)):
+            for member in self._buckets[band].get(value, ()):
+                other_hex, other_id = member.split(":", 1)
+                if other_id == external_source_id:
+                    continue
+                if bin(int(other_hex, 16) ^ fp).count("1") <= self.max_distance:
+                    return other_id
+        return None
+
+    async def sync(self) -> None:
+        now = time.time()
+        since = max(self._synced_at - _SYNC_OVERLAP_SECONDS, now - self.max_age_seconds)
+        try:
+            rows = await get_async_redis().zrangebyscore(_REDIS_KEY, since, "+inf", withscores=True)
+        except Exception as exc:
+            logger.debug("Near-duplicate index sync failed: %s", exc)
+            return
+        for member, score in rows:
+            self._insert(member, score)
+            self._synced_at = max(self._synced_at, score)
+        self._evict(now)
+
+    def add(self, fp: int, external_source_id: str) -> None:
+        # Visible to find() right away; reaches other workers on publish()
+        now = time.time()
+        member = f"{fp:016x}:{external_source_id}"
+        self._insert(member, now)
+        self._pending[member] = now
+
+    async def publish(self) -> None:
+        if not self._pending:
+            return
+        members, self._pending = self._pending, {}
+        now = time.time()
+        self._evict(now)
+        try:
+            redis = get_async_redis()
+            pipe = redis.pipeline(transaction=False)
+            pipe.zadd(_REDIS_KEY, members)
+            self._writes += len(members)
+            if self._writes >= _TRIM_EVERY:
+                self._writes = 0
+                pipe.zremrangebyscore(_REDIS_KEY, "-inf", now - self.max_age_seconds)
+                pipe.zremrangebyrank(_REDIS_KEY, 0, -self.max_entries - 1)
+            await pipe.execute()
+        except Exception as exc:
+            logger.debug("Near-duplicate index publish failed: %s", exc)
+
+
+_index: NearDuplicateIndex | None = None
+
+
+def get_near_dup_index() -> NearDuplicateIndex | None:
+    global _index
+    if not settings.NEAR_DUP_ENABLED:
+        return None
+    if _index is None:
+        _index = NearDuplicateIndex(
+            max_distance=settings.NEAR_DUP_MAX_DISTANCE,
+            max_entries=settings.NEAR_DUP_MAX_ENTRIES,
+            max_age_seconds=settings.NEAR_DUP_MAX_AGE_HOURS * 3600,
+        )
+    return _index
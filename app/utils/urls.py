@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import List
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+# Query parameters that only identify the campaign or click, never the content
+_TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "mc_cid",
+    "mc_eid",
+    "igshid",
+    "_hsenc",
+    "_hsmi",
+    "spm",
+}
+_TRACKING_PREFIXES = ("utm_",)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _is_tracking(name: str) -> bool:
+    lowered = name.lower()
+    return lowered in _TRACKING_PARAMS or lowered.startswith(_TRACKING_PREFIXES)
+
+
+def _query_pieces(query: str) -> List[str]:
+    # Raw "name=value" pieces, still encoded as the server sent them
+    return [p for p in query.split("&") if not _is_tracking(unquote_plus(p.split("=", 1)[0]))]
+
+
+def canonicalize_url(url: str) -> str:
+    """Cleaned-up link, safe to publish and to follow.
+
+    Lower-cases scheme and host, drops default ports, the fragment and tracking
+    parameters (utm_*, fbclid, ...). The path and the rest of the query stay byte for
+    byte as they were, in their order: servers may read either case-sensitively,
+    positionally or in a specific encoding.
+    """
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.hostname:
+        return url
+    scheme = parts.scheme.lower()
+    host = parts.hostname.lower().rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        host = f"{userinfo}@{host}"
+    query = "&".join(_query_pieces(parts.query)) if parts.query else ""
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def url_key(url: str) -> str:
+    """Identity of a canonicalized link for dedupe keys: its query pieces sorted.
+
+    Never published; the same article linked with parameters in another order
+    hashes alike.
+    """
+    base, sep, query = url.partition("?")
+    if not sep:
+        return url
+    return f"{base}?{'&'.join(sorted(query.split('&')))}"
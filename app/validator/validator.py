@@ -1,24 +1,158 @@
 from __future__ import annotations
 
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
 import httpx
 from ..config import settings
 from ..schemas import StandardTask
 
+ValidationResult = Tuple[bool, Optional[str]]
+
+
+class _HostState:
+    __slots__ = ("semaphore", "next_at", "users")
+
+    def __init__(self) -> None:
+        self.semaphore = asyncio.Semaphore(max(1, settings.VALIDATION_PER_HOST_CONCURRENCY))
+        self.next_at = 0.0
+        # Checks holding or waiting for the semaphore; only idle hosts may be evicted
+        self.users = 0
+
+
+class LinkValidator:
+    """Shared-client link checker with a TTL result cache and per-host limits."""
+
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+        # url -> (expires_at, result); negative results get a shorter TTL
+        self._cache: "OrderedDict[str, Tuple[float, ValidationResult]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Per-host limits, least recently used first and capped at VALIDATION_MAX_HOSTS
+        self._hosts: "OrderedDict[str, _HostState]" = OrderedDict()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=settings.REQUEST_TIMEOUT_SECONDS,
+                follow_redirects=True,
+                headers={"User-Agent": settings.USER_AGENT},
+                limits=httpx.Limits(max_connections=settings.VALIDATION_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _cached(self, url: str) -> Optional[ValidationResult]:
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[url]
+            return None
+        self._cache.move_to_end(url)
+        return entry[1]
+
+    def _store(self, url: str, result: ValidationResult) -> None:
+        ttl = settings.VALIDATION_CACHE_TTL_SECONDS if result[0] else settings.VALIDATION_NEGATIVE_TTL_SECONDS
+        self._cache[url] = (time.monotonic() + ttl, result)
+        self._cache.move_to_end(url)
+        while len(self._cache) > settings.VALIDATION_CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    async def validate(self, url: str) -> ValidationResult:
+        cached = self._cached(url)
+        if cached is not None:
+            return cached
+        # Concurrent checks of the same URL share one request
+        pending = self._inflight.get(url)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = fut
+        try:
+            result = await self._check(url)
+            self._store(url, result)
+            fut.set_result(result)
+            return result
+        except BaseException:
+            fut.cancel()
+            raise
+        finally:
+            self._inflight.pop(url, None)
+
+    def _host(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+            # Evict idle hosts from the old end; one still in use stops the sweep, the
+            # cap is soft while that many hosts are being checked at once
+            while len(self._hosts) > settings.VALIDATION_MAX_HOSTS:
+                oldest, oldest_state = next(iter(self._hosts.items()))
+                if oldest_state.users or oldest == host:
+                    break
+                del self._hosts[oldest]
+        else:
+            self._hosts.move_to_end(host)
+        return state
+
+    @staticmethod
+    async def _polite(state: _HostState) -> None:
+        # Reserve the next slot for this host before sleeping so waiters queue up in order
+        delay = settings.VALIDATION_HOST_DELAY_MS / 1000
+        now = time.monotonic()
+        slot = max(now, state.next_at)
+        state.next_at = slot + delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _check(self, url: str) -> ValidationResult:
+        state = self._host(urlsplit(url).hostname or "")
+        state.users += 1
+        client = self._get_client()
+        try:
+            async with state.semaphore:
+                await self._polite(state)
+                resp = await client.head(url)
+                status = resp.status_code
+                if status >= 400:
+                    # try GET as fallback; the status is known once headers arrive,
+                    # so the body is never downloaded
+                    await self._polite(state)
+                    async with client.stream("GET", url) as streamed:
+                        status = streamed.status_code
+            ok = status < 400
+            return ok, None if ok else f"bad_status:{status}"
+        except Exception as exc:
+            return False, f"exception:{type(exc).__name__}"
+        finally:
+            state.users -= 1
+
+
+_validator: LinkValidator | None = None
+
+
+def get_link_validator() -> LinkValidator:
+    global _validator
+    if _validator is None:
+        _validator = LinkValidator()
+    return _validator
+
+
+async def close_link_validator() -> None:
+    global _validator
+    if _validator is not None:
+        await _validator.aclose()
+        _validator = None
+
 
 async def validate_task(task: StandardTask) -> tuple[bool, str | None]:
     if not settings.ENABLE_VALIDATION:
         return True, None
-
-    timeout = settings.REQUEST_TIMEOUT_SECONDS
-    headers = {"User-Agent": settings.USER_AGENT}
-
-    try:
-        async with httpx.AsyncClient(timeout=timeout, follow_redirects=True, headers=headers) as client:
-            resp = await client.head(str(task.source_url))
-            if resp.status_code >= 400:
-                # try GET as fallback
-                resp = await client.get(str(task.source_url))
-            ok = resp.status_code < 400
-            return ok, None if ok else f"bad_status:{resp.status_code}"
-    except Exception as exc:
-        return False, f"exception:{type(exc).__name__}"
\ No newline at end of file
+    return await get_link_validator().validate(str(task.source_url))
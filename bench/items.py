@@ -0,0 +1,118 @@
+"""Microbenchmark of per-entry item handling, validated models vs the fast path.
+
+    python -m bench.items                 # 10k entries, best of 5
+    python -m bench.items --entries 50000 --repeat 3
+
+Covers only what the pipeline does with each entry outside parsing and I/O:
+building the item, computing its identity hash where the collector, the dedupe
+filter and the generator need it, and building the StandardTask.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from app.schemas import CollectedItem, FeedItem, StandardTask
+from app.utils.hashing import compute_item_hash
+
+Entry = Tuple[str, str, str, datetime]
+
+
+def make_entries(n: int) -> List[Entry]:
+    now = datetime(2024, 1, 1)
+    return [
+        (f"https://host{i % 50}.example.com/articles/{i}?ref=rss", f"Article {i} title", "summary " * 40, now)
+        for i in range(n)
+    ]
+
+
+def validated_path(source_id: str, entries: List[Entry]) -> int:
+    # Behaviour before the fast path: pydantic validation on both models and one hash per consumer
+    published = 0
+    for link, title, summary, published_at in entries:
+        item = CollectedItem(
+            source_id=source_id,
+            url=link,
+            title=title,
+            summary=summary,
+            published_at=published_at,
+            raw={"external_source_id": compute_item_hash(source_id, link)},
+        )
+        compute_item_hash(item.source_id, str(item.url))  # dedupe filter
+        external_source_id = item.raw.get("external_source_id") or compute_item_hash(item.source_id, str(item.url))
+        task = StandardTask(
+            external_source_id=external_source_id,
+            title=item.title[:200],
+            description=item.summary[:2000],
+            source_url=item.url,
+            source_id=item.source_id,
+            meta={"generator": "fallback"},
+        )
+        published += bool(str(task.source_url))
+    return published
+
+
+def fast_path(source_id: str, entries: List[Entry]) -> int:
+    published = 0
+    for link, title, summary, published_at in entries:
+        item = FeedItem(source_id, link, title, summary, published_at)
+        item.external_source_id  # dedupe filter
+        task = StandardTask(
+            external_source_id=item.external_source_id,
+            title=item.title[:200],
+            description=item.summary[:2000],
+            source_url=item.url,
+            source_id=item.source_id,
+            meta={"generator": "fallback"},
+        )
+        published += bool(str(task.source_url))
+    return published
+
+
+def _best_of(fn: Callable[[str, List[Entry]], int], entries: List[Entry], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn("bench", entries)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _bytes_per_item(build: Callable[[Entry], object], entries: List[Entry]) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build(entry) for entry in entries]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / max(1, len(held))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    entries = make_entries(args.entries)
+    assert validated_path("bench", entries[:10]) == fast_path("bench", entries[:10]) == 10
+    slow = _best_of(validated_path, entries, args.repeat)
+    fast = _best_of(fast_path, entries, args.repeat)
+    print(f"{args.entries} entries, best of {args.repeat}")
+    print(f"   validated  {slow * 1000:9.1f} ms  {slow / args.entries * 1e6:7.2f} us/entry")
+    print(f"   fast path  {fast * 1000:9.1f} ms  {fast / args.entries * 1e6:7.2f} us/entry")
+    print(f"   speedup    {slow / fast:9.2f}x")
+    model_bytes = _bytes_per_item(
+        lambda e: CollectedItem(source_id="bench", url=e[0], title=e[1], summary=e[2], published_at=e[3], raw={"external_source_id": compute_item_hash("bench", e[0])}),
+        entries,
+    )
+    feed_bytes = _bytes_per_item(lambda e: FeedItem("bench", e[0], e[1], e[2], e[3]), entries)
+    print(f"   memory     CollectedItem {model_bytes:.0f} B/item, FeedItem {feed_bytes:.0f} B/item (summary text shared)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
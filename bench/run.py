@@ -0,0 +1,217 @@
+"""Offline end-to-end benchmark of stream_collector + process_items.
+
+    python -m bench.run                 # all scenarios
+    python -m bench.run ai_batched      # one scenario
+    python -m bench.run --json          # machine-readable output
+
+Feeds, Redis, the LLM and the Task API are replaced by in-process stand-ins
+(see bench/standins.py), so no network access is needed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from bench import standins
+from bench.synthetic import make_feed
+
+
+@dataclass
+class Scenario:
+    name: str
+    entries: int
+    summary_bytes: int = 400
+    duplicate_ratio: float = 0.1
+    fmt: str = "rss"
+    enable_ai: bool = False
+    enable_validation: bool = False
+    llm_latency: float = 0.05
+    task_api_latency: float = 0.01
+    link_latency: float = 0.01
+    # Extra settings applied for this scenario only
+    overrides: Dict[str, Any] = field(default_factory=dict)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    s.name: s
+    for s in [
+        Scenario("fallback_small", entries=200),
+        Scenario("fallback_large", entries=10000, duplicate_ratio=0.3),
+        # Same feed through the buffered feedparser path, for comparison with streaming
+        Scenario("fallback_large_buffered", entries=10000, duplicate_ratio=0.3, overrides={"FEED_STREAMING": False}),
+        Scenario("atom_large", entries=10000, fmt="atom", duplicate_ratio=0.3),
+        Scenario("ai", entries=500, enable_ai=True),
+        Scenario("ai_batched", entries=500, enable_ai=True, overrides={"LLM_BATCH_SIZE": 8}),
+        Scenario("ai_validation", entries=500, enable_ai=True, enable_validation=True),
+        Scenario("publish_batched", entries=2000, overrides={"TASK_API_BATCH_ENABLED": True}),
+    ]
+}
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(pct) - 1]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _instrument(timings: Dict[str, List[float]]):
+    """Wrap each pipeline stage handler so its per-item latency is recorded."""
+    from app.pipeline import runner
+
+    original = runner.run_stages
+
+    async def timed_run_stages(items, stages, queue_size=100, **kwargs):
+        def wrap(stage):
+            handler = stage.handler
+            samples = timings.setdefault(stage.name, [])
+
+            async def timed(item):
+                start = time.perf_counter()
+                try:
+                    return await handler(item)
+                finally:
+                    samples.append(time.perf_counter() - start)
+
+            stage.handler = timed
+            return stage
+
+        return await original(items, [wrap(s) for s in stages], queue_size=queue_size, **kwargs)
+
+    runner.run_stages = timed_run_stages
+    return lambda: setattr(runner, "run_stages", original)
+
+
+async def run_scenario(scenario: Scenario) -> Dict[str, Any]:
+    from app.ai.generator import TaskGenerator
+    from app.collectors.rss_collector import RSSCollector
+    from app.pipeline.runner import process_items, stream_collector
+
+    saved = {k: getattr(settings, k) for k in ["ENABLE_AI", "ENABLE_VALIDATION", *scenario.overrides]}
+    settings.ENABLE_AI = scenario.enable_ai
+    settings.ENABLE_VALIDATION = scenario.enable_validation
+    for key, value in scenario.overrides.items():
+        setattr(settings, key, value)
+
+    url = f"https://bench.example.com/{scenario.name}.xml"
+    feed = make_feed(scenario.entries, scenario.summary_bytes, scenario.duplicate_ratio, fmt=scenario.fmt)
+    fake_llm = standins.install({url: feed}, scenario.llm_latency, scenario.task_api_latency, scenario.link_latency)
+    task_api = standins.task_api_client(scenario.task_api_latency)
+    generator = TaskGenerator()
+    collector = RSSCollector(scenario.name, scenario.name, url)
+
+    timings: Dict[str, List[float]] = {}
+    marks: Dict[str, float] = {}
+
+    async def observed(items):
+        # Collection overlaps processing: note when the first item arrives and when the feed ends
+        async for item in items:
+            marks.setdefault("first_item", time.perf_counter())
+            yield item
+        marks["collected"] = time.perf_counter()
+
+    restore = _instrument(timings)
+    try:
+        start = time.perf_counter()
+        async with aclosing(stream_collector(collector)) as items:
+            counts = await process_items(observed(items), task_api, generator, collector_id=collector.id)
+        elapsed = time.perf_counter() - start
+    finally:
+        restore()
+        await task_api.aclose()
+        for key, value in saved.items():
+            setattr(settings, key, value)
+
+    return {
+        "scenario": scenario.name,
+        "entries": scenario.entries,
+        "collected": counts.collected,
+        "seconds": round(elapsed, 3),
+        "first_item_seconds": round(marks.get("first_item", start) - start, 3),
+        "collect_seconds": round(marks.get("collected", start) - start, 3),
+        "items_per_sec": round(scenario.entries / elapsed, 1) if elapsed else None,
+        "llm_calls": fake_llm.calls,
+        "stages": {
+            name: {
+                "count": len(samples),
+                "p50_ms": round(_percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(_percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(_percentile(samples, 99) * 1000, 2),
+            }
+            for name, samples in timings.items()
+        },
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _print_report(result: Dict[str, Any]) -> None:
+    print(
+        f"\n== {result['scenario']}: {result['entries']} entries, {result['collected']} collected in "
+        f"{result['seconds']}s (first item {result['first_item_seconds']}s, collect {result['collect_seconds']}s) "
+        f"-> {result['items_per_sec']} items/s, "
+        f"llm_calls={result['llm_calls']}, peak_rss={result['peak_rss_mb']} MB"
+    )
+    print(f"   {'stage':<10} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, s in result["stages"].items():
+        print(f"   {name:<10} {s['count']:>7} {s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9}")
+
+
+def _run_isolated(name: str) -> Dict[str, Any]:
+    """Run one scenario in a child interpreter so its peak RSS is its own."""
+    result = subprocess.run(
+        [sys.executable, "-m", "bench.run", name, "--json", "--in-process"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"scenario {name} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per scenario")
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="run scenarios in this process (peak_rss then only ever grows across scenarios)",
+    )
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    for name in args.scenarios or list(SCENARIOS):
+        if args.in_process:
+            # Fresh on-disk state per scenario so caches do not leak between them
+            standins.configure_offline()
+            result = asyncio.run(run_scenario(SCENARIOS[name]))
+        else:
+            # ru_maxrss is a process-wide high-water mark, so each scenario gets its own process
+            result = _run_isolated(name)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            _print_report(result)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
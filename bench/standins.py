@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import tempfile
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import httpx
+
+from app.config import settings
+
+try:
+    import fakeredis
+except Exception:  # pragma: no cover
+    fakeredis = None  # type: ignore
+
+_NUMBERED = re.compile(r"^\[(\d+)\]", re.M)
+
+
+class FakeLitellm:
+    """Drop-in for the parts of litellm the generator uses, with fixed latency."""
+
+    def __init__(self, latency_seconds: float) -> None:
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+        self.set_verbose = False
+
+    async def acompletion(self, model: str, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_seconds)
+        prompt = messages[-1]["content"]
+        numbered = _NUMBERED.findall(prompt)
+        if numbered:
+            content = json.dumps(
+                [
+                    {"index": int(n), "title": f"Bench task {n}", "description": "generated", "priority": "medium", "status": "not_started"}
+                    for n in numbered
+                ]
+            )
+        else:
+            content = json.dumps({"title": "Bench task", "description": "generated", "priority": "medium", "status": "not_started"})
+        return {"choices": [{"message": {"content": content}}]}
+
+
+def feed_transport(documents: Dict[str, bytes], latency_seconds: float = 0.0) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency_seconds)
+        body = documents.get(str(request.url))
+        if body is None:
+            return httpx.Response(404)
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/rss+xml"})
+
+    return httpx.MockTransport(handler)
+
+
+def task_api_transport(latency_seconds: float) -> httpx.MockTransport:
+    counter = SimpleNamespace(n=0)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency_seconds)
+        if request.method == "GET":
+            return httpx.Response(200, json={"items": []})
+        if request.url.path.endswith("/tasks/batch"):
+            tasks = json.loads(request.content)["tasks"]
+            start = counter.n
+            counter.n += len(tasks)
+            return httpx.Response(201, json={"items": [{"id": f"bench-{start + i}"} for i in range(len(tasks))]})
+        counter.n += 1
+        return httpx.Response(201, json={"id": f"bench-{counter.n}"})
+
+    return httpx.MockTransport(handler)
+
+
+def link_transport(latency_seconds: float) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency_seconds)
+        return httpx.Response(200)
+
+    return httpx.MockTransport(handler)
+
+
+def configure_offline(workdir: str | None = None) -> str:
+    """Point every setting with external side effects at local, throwaway state."""
+    workdir = workdir or tempfile.mkdtemp(prefix="ingest-bench-")
+    settings.MOCK_PUBLISH = False
+    settings.MODEL_API_KEY = settings.MODEL_API_KEY or "bench"
+    settings.PERSIST_ENABLED = False
+    settings.DEDUPE_BLOOM_SNAPSHOT_PATH = f"{workdir}/dedupe.bloom"
+    settings.LLM_CACHE_PATH = f"{workdir}/llm_cache.sqlite3"
+    return workdir
+
+
+def install(
+    feeds: Dict[str, bytes],
+    llm_latency: float,
+    task_api_latency: float,
+    link_latency: float,
+    feed_latency: float = 0.0,
+) -> FakeLitellm:
+    """Swap every network dependency for an in-process stand-in and reset module state."""
+    if fakeredis is None:
+        raise RuntimeError("the benchmark needs fakeredis: pip install -r bench/requirements.txt")
+    from app.ai import engine
+    from app.ai import cache
+    from app.collectors import fetcher, watermark
+    from app.publisher import index
+    from app.utils import dedupe, simhash
+    from app.validator import validator
+
+    fake_llm = FakeLitellm(llm_latency)
+    engine.litellm = fake_llm
+
+    fetcher._http_client = httpx.AsyncClient(transport=feed_transport(feeds, feed_latency))
+    fetcher._validators.clear()
+    dedupe._async_redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    dedupe._bloom = None
+    dedupe._unsynced_keys = []
+    dedupe._redis_down_until = 0.0
+    cache._cache = None
+    watermark._store = None
+    index._index = None
+    simhash._index = None
+
+    link_checker = validator.LinkValidator()
+    link_checker._client = httpx.AsyncClient(transport=link_transport(link_latency), follow_redirects=True)
+    validator._validator = link_checker
+    return fake_llm
+
+
+def task_api_client(latency_seconds: float):
+    from app.publisher.client import TaskApiClient
+
+    client = TaskApiClient()
+    client._client = httpx.AsyncClient(transport=task_api_transport(latency_seconds))
+    return client
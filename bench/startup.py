@@ -0,0 +1,71 @@
+"""Import-time report and budget check for the service entry point.
+
+    python -m bench.startup                   # report, fail over the default budget
+    python -m bench.startup --budget-ms 400 --top 20
+
+Imports ``app.main`` in a fresh interpreter with ``-X importtime`` and prints the
+slowest modules by cumulative time. Exits non-zero if the total exceeds the budget
+or if a module that must load on first use (litellm, feedparser, apscheduler,
+redis, yaml) was imported eagerly. Meant for CI next to bench.run.
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Loaded on first use by the code that needs them, never while importing the app
+LAZY_MODULES = ("litellm", "feedparser", "apscheduler", "redis", "yaml")
+
+
+def measure(module: str = "app.main") -> Dict[str, Tuple[int, int]]:
+    """module -> (self us, cumulative us) as reported by ``python -X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    times: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return times
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    # First run writes any missing .pyc files, so the measured run reflects imports, not compilation
+    measure(args.module)
+    times = measure(args.module)
+    total_ms = times.get(args.module, (0, 0))[1] / 1000
+    top_level = {name: cum for name, (_, cum) in times.items() if "." not in name or name.startswith("app.")}
+    print(f"import {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, cum in sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"   {cum / 1000:8.1f} ms  {name}")
+
+    failed = False
+    eager = sorted({name.split(".")[0] for name in times} & set(LAZY_MODULES))
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: {total_ms:.0f} ms over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
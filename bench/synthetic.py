@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import List
+from xml.sax.saxutils import escape
+
+_WORDS = (
+    "release update security patch announcement python service api cluster "
+    "deadline meeting schedule migration outage report feature review 发布 通知 更新 公告 任务"
+).split()
+# Pad with pseudo-words: a 20-word vocabulary makes every entry look like a
+# near-duplicate of every other one, which real feeds do not
+_vocab_rng = random.Random(42)
+_WORDS += ["".join(_vocab_rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(_vocab_rng.randint(3, 9))) for _ in range(3000)]
+
+
+def _sentence(rng: random.Random, size: int) -> str:
+    words: List[str] = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def make_feed(
+    entries: int,
+    summary_bytes: int = 400,
+    duplicate_ratio: float = 0.0,
+    fmt: str = "rss",
+    seed: int = 0,
+    html_summary: bool = True,
+    hosts: int = 50,
+) -> bytes:
+    """Build a synthetic RSS 2.0 or Atom document.
+
+    ``duplicate_ratio`` of the entries reuse the link of an earlier entry, so
+    they should be dropped by dedupe. Links are spread over ``hosts`` hosts.
+    """
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    links: List[str] = []
+    parts: List[str] = []
+    for i in range(entries):
+        if links and rng.random() < duplicate_ratio:
+            link = rng.choice(links)
+        else:
+            link = f"https://site{i % max(1, hosts)}.bench.example.com/posts/{i}"
+            links.append(link)
+        title = escape(f"{_sentence(rng, 40)} #{i}")
+        summary = _sentence(rng, summary_bytes)
+        if html_summary:
+            summary = f'<p style="color:#333">{summary}</p><img src="https://t.example.com/p.gif?i={i}" width="1"/>'
+        published = now - timedelta(minutes=i)
+        if fmt == "atom":
+            parts.append(
+                f"<entry><id>{escape(link)}</id><title>{title}</title><link href=\"{escape(link)}\"/>"
+                f"<updated>{published.isoformat()}</updated><summary type=\"html\">{escape(summary)}</summary></entry>"
+            )
+        else:
+            parts.append(
+                f"<item><guid>{escape(link)}</guid><title>{title}</title><link>{escape(link)}</link>"
+                f"<pubDate>{format_datetime(published)}</pubDate><description>{escape(summary)}</description></item>"
+            )
+    if fmt == "atom":
+        doc = (
+            '<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>bench</title><id>urn:bench</id><updated>{now.isoformat()}</updated>{''.join(parts)}</feed>"
+        )
+    else:
+        doc = (
+            '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>bench</title>'
+            f"<link>https://bench.example.com/</link><description>bench</description>{''.join(parts)}</channel></rss>"
+        )
+    return doc.encode("utf-8")